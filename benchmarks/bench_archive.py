@@ -0,0 +1,108 @@
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from contextlib import redirect_stdout
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as tracker  # noqa: E402
+from constants import ARCHIVES_DIR, NOTES_DIR  # noqa: E402
+from store import (  # noqa: E402
+    archive_notes,
+    get_db,
+    migrate_legacy,
+    note_exists,
+    read_note,
+    shard_notes,
+)
+from x_api.tweet_session import read_session_note, split_into_tweets  # noqa: E402
+
+from corpus import write_notes  # noqa: E402
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+READS = 2_000
+# write_notes starts a session every 5 hours from 2020, so this is most of them.
+CUTOFF = datetime(2028, 1, 1)
+
+
+def usage(directory):
+    files = size = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, filename))
+    return files, size
+
+
+def per_read(label, fn, paths):
+    start = time.perf_counter()
+    for path in paths:
+        fn(path)
+    elapsed = (time.perf_counter() - start) / len(paths) * 1e6
+    print(f"{label:<36} {elapsed:10.1f} us")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        write_notes(SESSIONS)
+        with redirect_stdout(io.StringIO()):
+            migrate_legacy()
+        shard_notes()
+
+        rows = get_db().execute("SELECT path, start_time FROM sessions").fetchall()
+        originals = {}
+        for row in rows:
+            with open(row["path"]) as f:
+                originals[row["path"]] = f.read()
+        files, size = usage(NOTES_DIR)
+        print(f"before: {files} notes, {size / 1e6:.1f} MB")
+
+        rng = random.Random(0)
+        old = [row["path"] for row in rows if row["start_time"] < CUTOFF.timestamp()]
+        sample = rng.sample(old, min(READS, len(old)))
+        per_read("read a note file", read_note, sample)
+
+        start = time.perf_counter()
+        archived = archive_notes(CUTOFF.timestamp())
+        print(f"{'archive':<36} {(time.perf_counter() - start) * 1000:10.1f} ms")
+        assert archived == len(old), (archived, len(old))
+        assert archive_notes(CUTOFF.timestamp()) == 0
+
+        files, size = usage(NOTES_DIR)
+        archive_files, archive_size = usage(ARCHIVES_DIR)
+        print(
+            f"after: {files} notes, {size / 1e6:.1f} MB, plus {archive_files} "
+            f"archive of {archive_size / 1e6:.1f} MB"
+        )
+        assert not any(os.path.exists(path) for path in old)
+
+        per_read("read an archived note", read_note, sample)
+        (archive,) = os.listdir(ARCHIVES_DIR)
+        archive = os.path.join(ARCHIVES_DIR, archive)
+        per_read(
+            "open the zip and read the note",
+            lambda path: zipfile.ZipFile(archive).read(path),
+            sample[:20],
+        )
+
+        for path, text in originals.items():
+            assert note_exists(path)
+            assert read_note(path) == text, path
+        with zipfile.ZipFile(archive) as zf:
+            assert zf.testzip() is None
+
+        # Everything that reads notes still sees the archived ones.
+        with redirect_stdout(io.StringIO()):
+            tracker.collect_notes(1, SESSIONS, "•")
+        assert split_into_tweets(read_session_note(sample[0]))
+        print("archived notes match the originals")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blocklists import load_profile  # noqa: E402
+from constants import BLOCKLISTS_DIR  # noqa: E402
+from hosts import update_blocked_domains  # noqa: E402
+
+from corpus import timed  # noqa: E402
+
+PROFILE_DOMAINS = 50_000
+TLDS = ["com", "net", "org", "io", "co.uk", "de", "tv"]
+
+
+def write_profile(name, count):
+    os.makedirs(BLOCKLISTS_DIR, exist_ok=True)
+    with open(os.path.join(BLOCKLISTS_DIR, f"{name}.txt"), "w") as f:
+        f.write("# synthetic profile\n")
+        for i in range(count):
+            tld = TLDS[i % len(TLDS)]
+            if i % 5 == 0:
+                f.write(f"0.0.0.0 cdn{i}.site{i}.{tld}\n")
+            elif i % 7 == 0:
+                f.write(f"https://Site{i}.{tld}/feed\n")
+            else:
+                f.write(f"site{i}.{tld}\n")
+        # Duplicates in a different spelling must collapse.
+        f.write(f"SITE1.{TLDS[1]}.\n")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        write_profile("social", PROFILE_DOMAINS)
+        profile_path = os.path.join(BLOCKLISTS_DIR, "social.txt")
+        hosts_path = os.path.join(tmp, "hosts")
+        with open(hosts_path, "w") as f:
+            f.write("127.0.0.1 localhost\n")
+
+        domains, _ = timed("cold compile", load_profile, "social")
+        timed("warm load (stat match)", load_profile, "social")
+        os.utime(profile_path)
+        timed("touched source (hash match)", load_profile, "social")
+        warm, _ = timed("warm load", load_profile, "social")
+        assert warm == domains
+        timed("write hosts block", update_blocked_domains, domains, hosts_path)
+
+        timed(
+            "start --profile social (warm)",
+            lambda: update_blocked_domains(load_profile("social"), hosts_path),
+        )
+        print(f"{len(domains)} hosts entries from {PROFILE_DOMAINS} source lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as tracker  # noqa: E402
+from store import (  # noqa: E402
+    get_db,
+    get_session_columns,
+    migrate_legacy,
+    sessions_started_between,
+)
+
+from corpus import FIRST_SESSION, write_notes  # noqa: E402
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+LOOKUPS = 1_000
+
+
+def per_call(label, fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(*arg)
+    elapsed = (time.perf_counter() - start) / len(args) * 1e6
+    print(f"{label:<40} {elapsed:10.1f} us")
+
+
+def scan(since, until):
+    # What finding a day's sessions costs without the index.
+    starts, _ = get_session_columns()
+    numbers = [n for n, start in enumerate(starts, 1) if since <= start < until]
+    return (min(numbers), max(numbers)) if numbers else (None, None)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        write_notes(SESSIONS)
+        with redirect_stdout(io.StringIO()):
+            migrate_legacy()
+
+        plan = " ".join(
+            row[-1]
+            for row in get_db().execute(
+                "EXPLAIN QUERY PLAN SELECT MIN(number), MAX(number) FROM sessions "
+                "WHERE start_time >= ? AND start_time < ?",
+                (0, 1),
+            )
+        )
+        assert "INDEX sessions_by_start_duration (start_time>? AND start_time<?)" in (
+            plan
+        ), plan
+
+        rng = random.Random(0)
+        last_day = (FIRST_SESSION + timedelta(hours=5 * SESSIONS)).date()
+        days = [
+            FIRST_SESSION.date() + timedelta(days=rng.randint(0, 5 * SESSIONS // 24))
+            for _ in range(LOOKUPS)
+        ]
+        ranges = [
+            (tracker.day_start(day), tracker.day_start(day + timedelta(days=1)))
+            for day in days
+        ]
+        per_call("find a day's sessions (index)", sessions_started_between, ranges)
+        per_call("find a day's sessions (scan)", scan, ranges[:20])
+        for since, until in ranges[:20]:
+            assert tuple(sessions_started_between(since, until)) == scan(since, until)
+
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            tracker.collect_all_days("•")
+        elapsed = time.perf_counter() - start
+        count = get_db().execute("SELECT COUNT(*) FROM days").fetchone()[0]
+        print(f"collect --all-days: {count} days in {elapsed:.1f} s")
+        assert count == (last_day - FIRST_SESSION.date()).days + 1
+
+        # Every session is in exactly one day, and only with sessions started that day.
+        covered = []
+        for first, last in get_db().execute(
+            "SELECT first_session, last_session FROM days ORDER BY first_session"
+        ):
+            started = {
+                date.fromtimestamp(row[0])
+                for row in get_db().execute(
+                    "SELECT start_time FROM sessions WHERE number BETWEEN ? AND ?",
+                    (first, last),
+                )
+            }
+            assert len(started) == 1, (first, last, started)
+            covered.extend(range(first, last + 1))
+        assert covered == list(range(1, SESSIONS + 1))
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            tracker.collect_all_days("•")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"collect --all-days again: nothing to do in {elapsed:.1f} ms")
+        assert output.getvalue().startswith("Every day before today"), output.getvalue()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import statistics
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dns_sinkhole import QTYPE_A, DNSSinkhole, parse_question  # noqa: E402
+
+QUERIES = 20_000
+IN_FLIGHT = 64
+BLOCKED_DOMAINS = 50_000
+UPSTREAM_ANSWER = bytes([93, 184, 216, 34])
+
+
+def build_query(query_id, name, qtype=QTYPE_A):
+    question = b"".join(
+        bytes([len(label)]) + label.encode() for label in name.split(".")
+    )
+    return (
+        struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+        + question
+        + b"\0"
+        + struct.pack("!HH", qtype, 1)
+    )
+
+
+def answer_address(response):
+    _, _, _, question_end = parse_question(response)
+    if struct.unpack_from("!H", response, 6)[0] == 0:
+        return None
+    # Answer: name pointer, type, class, ttl, rdlength, then the address.
+    return response[question_end + 12 : question_end + 16]
+
+
+class StandInUpstream(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        _, qtype, _, question_end = parse_question(data)
+        header = struct.pack(
+            "!HHHHHH", struct.unpack_from("!H", data)[0], 0x8180, 1, 1, 0, 0
+        )
+        answer = struct.pack("!HHHIH", 0xC00C, qtype, 1, 300, 4) + UPSTREAM_ANSWER
+        self.transport.sendto(header + data[12:question_end] + answer, addr)
+
+
+class Client(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.waiters = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if waiter := self.waiters.pop(struct.unpack_from("!H", data)[0], None):
+            waiter.set_result(data)
+
+    async def resolve(self, query_id, name):
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[query_id] = waiter
+        self.transport.sendto(build_query(query_id, name))
+        return await asyncio.wait_for(waiter, 2)
+
+
+async def run_queries(client, names):
+    latencies = []
+    semaphore = asyncio.Semaphore(IN_FLIGHT)
+
+    async def one(query_id, name):
+        async with semaphore:
+            start = time.perf_counter()
+            await client.resolve(query_id, name)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i & 0xFFFF, name) for i, name in enumerate(names)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label, elapsed, latencies):
+    latencies.sort()
+    print(
+        f"{label:<22} {len(latencies) / elapsed:9.0f} q/s   "
+        f"p50 {statistics.median(latencies) * 1e6:6.0f} us   "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:6.0f} us"
+    )
+
+
+async def main():
+    loop = asyncio.get_running_loop()
+    upstream_transport, _ = await loop.create_datagram_endpoint(
+        StandInUpstream, local_addr=("127.0.0.1", 0)
+    )
+    sinkhole = DNSSinkhole(upstream=upstream_transport.get_extra_info("sockname"))
+
+    start = time.perf_counter()
+    sinkhole.block(f"site{i}.com" for i in range(BLOCKED_DOMAINS))
+    print(
+        f"loaded {BLOCKED_DOMAINS} domains in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+
+    address = await sinkhole.start(("127.0.0.1", 0))
+    client_transport, client = await loop.create_datagram_endpoint(
+        Client, remote_addr=address
+    )
+
+    assert answer_address(await client.resolve(1, "site7.com")) == bytes(4)
+    assert answer_address(await client.resolve(2, "cdn.site7.com")) == bytes(4)
+    assert answer_address(await client.resolve(3, "example.org")) == UPSTREAM_ANSWER
+    start = time.perf_counter()
+    sinkhole.unblock(["site7.com"])
+    sinkhole.block(["example.org"])
+    print(f"runtime block change in {(time.perf_counter() - start) * 1e6:.0f} us")
+    assert answer_address(await client.resolve(4, "cdn.site7.com")) == UPSTREAM_ANSWER
+    assert answer_address(await client.resolve(5, "www.example.org")) == bytes(4)
+
+    report(
+        "blocked (wildcard)",
+        *await run_queries(client, [f"www.site{i}.com" for i in range(QUERIES)]),
+    )
+    report(
+        "forwarded",
+        *await run_queries(client, [f"host{i}.example.net" for i in range(QUERIES)]),
+    )
+
+    client_transport.close()
+    sinkhole.close()
+    upstream_transport.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
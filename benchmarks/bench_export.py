@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as tracker  # noqa: E402
+from constants import POST_SESSION_RECAP_QS  # noqa: E402
+from export import export_sessions  # noqa: E402
+from store import get_answers, migrate_legacy  # noqa: E402
+
+from corpus import FIRST_SESSION, write_notes  # noqa: E402
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+# One line for each recap question, then the empty line that ends it.
+ANSWERS = "exported the history\n\n" * 3
+
+
+def export(fmt, output, since_last=False):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with redirect_stderr(io.StringIO()):
+        export_sessions(fmt, output, since_last)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        write_notes(SESSIONS)
+        with redirect_stdout(io.StringIO()):
+            migrate_legacy()
+
+        # Peak memory for the last quarter of the history and for all of it.
+        for fmt in ["jsonl", "csv"]:
+            peaks = []
+            for count in [SESSIONS // 4, SESSIONS]:
+                tracker.get_state().values["export_cursor"] = SESSIONS - count
+                elapsed, peak = export(fmt, f"all.{fmt}", since_last=True)
+                size = os.path.getsize(f"all.{fmt}")
+                print(
+                    f"{fmt:<5} {count:>7} sessions: {elapsed * 1000:8.1f} ms, "
+                    f"{size / 1e6:6.1f} MB written, peak memory {peak / 1e3:7.1f} KB"
+                )
+                peaks.append(peak)
+            # Flat, give or take the odd longer note.
+            assert peaks[1] < peaks[0] * 1.5, peaks
+
+        # The same full export without tracemalloc slowing every allocation down.
+        start = time.perf_counter()
+        with redirect_stderr(io.StringIO()):
+            export_sessions("jsonl", os.devnull)
+        elapsed = time.perf_counter() - start
+        print(f"jsonl {SESSIONS:>7} sessions untraced: {elapsed * 1000:8.1f} ms")
+
+        # Both formats hold every session and every answer line, in order.
+        with open("all.jsonl") as f:
+            records = list(map(json.loads, f))
+        with open("all.csv", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["session"] for r in records] == list(range(1, SESSIONS + 1))
+        assert [int(r["session"]) for r in rows] == list(range(1, SESSIONS + 1))
+        expected = {}
+        for answer in get_answers(1, SESSIONS):
+            expected.setdefault(answer["session"], {}).setdefault(
+                answer["question"], []
+            ).append(answer["text"])
+        for record, row in zip(records, rows):
+            assert record["answers"] == expected.get(record["session"], {})
+            for question in POST_SESSION_RECAP_QS:
+                lines = record["answers"].get(question, [])
+                assert row[question] == "\n".join(lines)
+
+        # A nightly --since-last run only writes what's new.
+        start = FIRST_SESSION + timedelta(hours=5 * SESSIONS + 1)
+        with redirect_stdout(io.StringIO()):
+            sys.stdin = io.StringIO(ANSWERS * 3)
+            for i in range(3):
+                tracker.prompt_user(start + timedelta(hours=i), "•")
+        export("jsonl", "new.jsonl", since_last=True)
+        with open("new.jsonl") as f:
+            new = [json.loads(line)["session"] for line in f]
+        assert new == [SESSIONS + 1, SESSIONS + 2, SESSIONS + 3], new
+        export("jsonl", "new.jsonl", since_last=True)
+        assert os.path.getsize("new.jsonl") == 0
+        print("exports match the store; --since-last wrote only new sessions")
+
+
+if __name__ == "__main__":
+    main()
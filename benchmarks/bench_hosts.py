@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import FOOTER_BLOCK, HEADER_BLOCK  # noqa: E402
+from hosts import read_blocked_domains, update_blocked_domains  # noqa: E402
+
+from corpus import timed, write_hosts  # noqa: E402
+
+HOSTS_LINES = 500_000
+SITES = ["youtube", "x", "facebook", "instagram"]
+
+
+def legacy_block_and_remove(path, domains):
+    with open(path, "a") as hosts_file:
+        hosts_file.write(HEADER_BLOCK)
+        hosts_file.write("\n".join(f"0.0.0.0 {d}" for d in domains))
+        hosts_file.write("\n")
+        hosts_file.write(FOOTER_BLOCK)
+
+    with open(path, "r") as hosts_file:
+        lines = hosts_file.readlines()
+    with open(path, "w") as hosts_file:
+        seen_header_block = False
+        for line in lines:
+            if line == HEADER_BLOCK:
+                seen_header_block = True
+            elif not seen_header_block:
+                hosts_file.write(line)
+            elif line == FOOTER_BLOCK:
+                break
+
+
+def main():
+    domains = [d for site in SITES for d in (f"{site}.com", f"www.{site}.com")]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hosts")
+        write_hosts(path, HOSTS_LINES)
+        print(f"hosts file: {HOSTS_LINES} lines, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        timed("legacy append + rewrite", legacy_block_and_remove, path, domains)
+
+        # Leave something after the block to check it survives the rewrites.
+        update_blocked_domains(domains[:2], path)
+        with open(path, "a") as f:
+            f.write("# trailing entry\n")
+        with open(path, "rb") as f:
+            original_tail = f.read()[-17:]
+
+        timed("block (changed set)", update_blocked_domains, domains, path)
+        timed("block (unchanged set)", update_blocked_domains, domains, path)
+        timed("read blocked domains", read_blocked_domains, path)
+        timed("remove block", update_blocked_domains, [], path)
+        timed("remove (nothing blocked)", update_blocked_domains, [], path)
+
+        with open(path, "rb") as f:
+            content = f.read()
+        assert HEADER_BLOCK.encode() not in content
+        assert content.endswith(original_tail)
+        assert content.count(b"\n") == HOSTS_LINES + 3
+
+
+if __name__ == "__main__":
+    main()
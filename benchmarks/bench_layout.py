@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import NOTES_DIR  # noqa: E402
+from notes import session_note_path  # noqa: E402
+from store import (  # noqa: E402
+    get_db,
+    get_sessions,
+    list_sessions,
+    migrate_legacy,
+    shard_notes,
+)
+
+from corpus import timed, write_notes  # noqa: E402
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+LOOKUPS = 10_000
+PAGE = 20
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        start = time.perf_counter()
+        write_notes(SESSIONS)
+        print(
+            f"{SESSIONS} notes in one flat folder, written in "
+            f"{time.perf_counter() - start:.1f} s"
+        )
+        timed("import into store", migrate_legacy, width=36)
+        timed("list the flat folder", lambda: sorted(os.listdir(NOTES_DIR)), width=36)
+
+        # A migration cut short: some notes moved, their rows not yet updated.
+        db = get_db()
+        for row in db.execute(
+            "SELECT number, start_time, path FROM sessions LIMIT 500"
+        ):
+            target = session_note_path(
+                row["number"], datetime.fromtimestamp(row["start_time"])
+            )
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.rename(row["path"], target)
+
+        (moved, _), _ = timed("move into month folders", shard_notes, width=36)
+        assert moved == SESSIONS, moved
+        moved_again, _ = timed("move again (nothing to do)", shard_notes, width=36)
+        assert moved_again == (0, 0), moved_again
+        assert not [name for name in os.listdir(NOTES_DIR) if name.endswith(".md")]
+        rows = db.execute("SELECT path FROM sessions").fetchall()
+        assert all(os.path.exists(row["path"]) for row in rows)
+        biggest = max(len(files) for _, _, files in os.walk(NOTES_DIR))
+        print(f"largest folder: {biggest} notes")
+
+        rng = random.Random(0)
+        numbers = [rng.randint(1, SESSIONS) for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        for number in numbers:
+            (row,) = get_sessions(number, number)
+        per_lookup = (time.perf_counter() - start) / LOOKUPS * 1e6
+        print(f"{'look up a note by number':<36} {per_lookup:10.1f} us")
+
+        first, _ = timed("first page", list_sessions, None, PAGE, width=36)
+        last, _ = timed("last page", list_sessions, PAGE + 1, PAGE, width=36)
+        assert first[0]["number"] == SESSIONS and last[-1]["number"] == 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import POST_SESSION_RECAP_QS  # noqa: E402
+from notes import parse_note, parse_notes, render_session_note  # noqa: E402
+from store import get_sessions, migrate_legacy, refresh_sessions  # noqa: E402
+
+from corpus import timed, write_notes  # noqa: E402
+
+SESSIONS = 10_000
+
+
+def legacy_collect(paths):
+    # The per-question regex loop collect_notes used to run over every file.
+    combined_content = [(q, []) for q in POST_SESSION_RECAP_QS]
+    session_durations = []
+    for filepath in paths:
+        with open(filepath, "r") as f:
+            content = f.read()
+        duration_match = re.search(r"\*\*Session \d+ - (.+)\*\*", content)
+        if duration_match:
+            session_durations.append(duration_match.group(1))
+        for i, (question, answers) in enumerate(combined_content):
+            pattern = f"\\*\\*{re.escape(question)}\\*\\*\n(.*?)(?=\\*\\*|$)"
+            matches = re.findall(pattern, content, re.DOTALL)
+            if matches:
+                if match_arr := matches[0].strip().split("\n"):
+                    filtered_matches = [m.strip() for m in match_arr if m.strip()]
+                    if filtered_matches:
+                        combined_content[i] = (question, answers + filtered_matches)
+    return dict(combined_content)
+
+
+def single_pass_collect(paths):
+    combined_content = {q: [] for q in POST_SESSION_RECAP_QS}
+    for note in parse_notes(paths):
+        for question, answers in note["answers"].items():
+            combined_content[question].extend(answers)
+    return combined_content
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        paths = write_notes(SESSIONS)
+        print(f"{SESSIONS} synthetic session notes")
+        legacy, legacy_time = timed("legacy regex collect", legacy_collect, paths)
+        single, single_time = timed("single-pass collect", single_pass_collect, paths)
+        assert legacy == single
+        print(f"speedup: {legacy_time / single_time:.1f}x")
+
+        # Front matter mangled by hand falls back to the heading, field by field.
+        start = datetime(2024, 5, 1, 9)
+        text = render_session_note(
+            7,
+            start,
+            start + timedelta(minutes=90),
+            "•",
+            "1 hours, 30 minutes",
+            {POST_SESSION_RECAP_QS[0]: "• fixed the parser"},
+        )
+        for field, value in [
+            ("session", "seven"),
+            ("duration", "1h"),
+            ("start", "yesterday"),
+            ("divider", "5"),
+        ]:
+            text = re.sub(f"\n{field}: .*\n", f"\n{field}: {value}\n", text)
+        note = parse_note(text)
+        assert (note["session"], note["duration"], note["divider"]) == (7, 5400, "•")
+        assert note["start"] is None and note["end"] is not None, note
+
+        timed("ingest into store", migrate_legacy)
+        timed("warm refresh", refresh_sessions)
+        for path in paths[::1000]:
+            with open(path, "a") as f:
+                f.write("edited\n")
+        timed(f"refresh ({len(paths[::1000])} edited)", refresh_sessions)
+
+        # The store takes the duration from start and end when the field itself
+        # is mangled and there is no heading to fall back on, and keeps what it
+        # had when start is mangled too.
+        (row,) = get_sessions(2, 2)
+        with open(row["path"]) as f:
+            text = f.read()
+        text = re.sub(r"\nduration: .*\n", "\nduration: 50m\n", text)
+        text = re.sub(r"\*\*Session \d+ - .*\*\*\n", "", text)
+        for mangled in [text, re.sub(r"\nstart: .*\n", "\nstart: soon\n", text)]:
+            with open(row["path"], "w") as f:
+                f.write(mangled)
+            refresh_sessions(2, 2)
+            (refreshed,) = get_sessions(2, 2)
+            assert refreshed["duration"] == row["duration"], dict(refreshed)
+            assert refreshed["start_time"] == row["start_time"], dict(refreshed)
+
+        # Touching every note forces a full re-read, like a cold collect.
+        for label, jobs, processes in [
+            ("cold refresh, 1 job", 1, False),
+            ("cold refresh, 8 threads", 8, False),
+            ("cold refresh, 8 processes", 8, True),
+        ]:
+            for path in paths:
+                os.utime(path)
+            timed(label, refresh_sessions, 1, None, jobs, processes)
+
+
+if __name__ == "__main__":
+    main()
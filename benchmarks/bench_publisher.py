@@ -0,0 +1,182 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from check_posting import StandInAPI  # noqa: E402
+
+NOTES = 40
+LINES_PER_NOTE = 16
+LATENCY = 0.02
+
+
+class SlowAPI(StandInAPI):
+    # Every request takes LATENCY seconds, like a round trip to X would.
+    tweets = []
+    faults = []
+    requests = 0
+    times = []
+    posted_at = {}
+
+    def do_POST(self):
+        cls = type(self)
+        received = time.time()
+        cls.times.append(received)
+        time.sleep(LATENCY)
+        super().do_POST()
+        for _, text, _ in cls.tweets[len(cls.posted_at) :]:
+            cls.posted_at[text] = received
+
+
+def reset_api():
+    SlowAPI.tweets = []
+    SlowAPI.faults = []
+    SlowAPI.requests = 0
+    SlowAPI.times = []
+    SlowAPI.posted_at = {}
+
+
+def write_notes(directory, count, tag):
+    paths = []
+    for number in range(1, count + 1):
+        path = os.path.join(directory, f"{tag}_{number:02}.md")
+        with open(path, "w") as f:
+            for line in range(LINES_PER_NOTE):
+                f.write(
+                    f"• {tag} note {number}, line {line}: worked through the refactor.\n"
+                )
+        paths.append(path)
+    return paths
+
+
+def check_threads(queue, tweet_session, numbered=False):
+    # Each thread is posted in order, replying to its own previous post.
+    by_id = {tweet_id: (text, reply_to) for tweet_id, text, reply_to in SlowAPI.tweets}
+    texts = {text: tweet_id for tweet_id, text, _ in SlowAPI.tweets}
+    for note, _ in queue:
+        with open(note) as f:
+            tweets = tweet_session.split_into_tweets(f.read(), numbered)
+        previous = None
+        for tweet in tweets:
+            tweet_id = texts[tweet]
+            assert by_id[tweet_id][1] == previous, "reply chain is broken"
+            previous = tweet_id
+    assert len(SlowAPI.tweets) == len(texts), "a post was duplicated"
+
+
+def run(publisher, queue, jobs, limiter):
+    start = time.perf_counter()
+    # One line per thread is just noise here.
+    with redirect_stdout(io.StringIO()):
+        results = publisher.publish_batch(queue, jobs, limiter=limiter)
+    elapsed = time.perf_counter() - start
+    assert all(count for count in results.values()), results
+    return elapsed
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        # Must be set before x_api is imported; constants read it once.
+        os.environ["DWT_X_API_BASE"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ["HOME"] = tmp
+        os.environ["X_CLIENT_ID"] = "consumer-key"
+        os.environ["X_CLIENT_SECRET"] = "consumer-secret"
+
+        from x_api import auth, publisher, tweet_session
+
+        auth.write_cached_tokens("consumer-key", "token", "token-secret")
+        tweet_session.BACKOFF_BASE = 0.01
+        tweet_session.RATE_LIMIT_MARGIN = 0.01
+
+        unlimited = dict(limit=10**9, window=1, burst=10**6)
+        for jobs in (1, 8):
+            reset_api()
+            queue = [(note, None) for note in write_notes(tmp, NOTES, f"jobs{jobs}")]
+            elapsed = run(publisher, queue, jobs, publisher.TokenBucket(**unlimited))
+            check_threads(queue, tweet_session)
+            print(
+                f"jobs={jobs}: {len(SlowAPI.tweets)} posts in {NOTES} threads, "
+                f"{elapsed:.2f} s, {len(SlowAPI.tweets) / elapsed:.0f} posts/s"
+            )
+
+        # A small window: no span of `window` seconds may see more than `limit`.
+        limit, window, burst = 20, 1.0, 5
+        reset_api()
+        queue = [(note, None) for note in write_notes(tmp, 10, "limited")]
+        limiter = publisher.TokenBucket(limit, window, burst)
+        elapsed = run(publisher, queue, 8, limiter)
+        check_threads(queue, tweet_session)
+        times = sorted(SlowAPI.times)
+        busiest = max(
+            sum(1 for t in times[i:] if t < start + window)
+            for i, start in enumerate(times)
+        )
+        assert busiest <= limit, busiest
+        print(
+            f"limited to {limit}/{window:.0f}s: {len(times)} posts in {elapsed:.2f} s, "
+            f"at most {busiest} in any {window:.0f} s"
+        )
+
+        # Threads recover from a 429 through the shared limiter, and a scheduled
+        # thread waits for its time.
+        reset_api()
+        SlowAPI.faults = [429]
+        queue = [(note, None) for note in write_notes(tmp, 4, "held")]
+        post_at = time.time() + 0.5
+        queue.append((write_notes(tmp, 1, "scheduled")[0], post_at))
+        run(publisher, queue, 8, publisher.TokenBucket(**unlimited))
+        check_threads(queue, tweet_session)
+        first_scheduled = min(
+            t for text, t in SlowAPI.posted_at.items() if "scheduled" in text
+        )
+        assert first_scheduled >= post_at, "a scheduled thread posted early"
+
+        # Revoked tokens stop the threads that hit them instead of prompting for a
+        # PIN from a worker; the next run authorizes once, from the main thread.
+        authorized = []
+
+        def authorize(consumer_key, consumer_secret):
+            authorized.append(threading.current_thread())
+            return "token", "token-secret"
+
+        auth.authorize = authorize
+        reset_api()
+        SlowAPI.faults = [401]
+        revoked = [(note, None) for note in write_notes(tmp, 8, "revoked")]
+        with redirect_stdout(io.StringIO()):
+            results = publisher.publish_batch(
+                revoked, 8, limiter=publisher.TokenBucket(**unlimited)
+            )
+        assert None in results.values() and not authorized, (results, authorized)
+        assert auth.read_cached_tokens("consumer-key") is None
+        with redirect_stdout(io.StringIO()):
+            results = publisher.publish_batch(
+                revoked, 8, limiter=publisher.TokenBucket(**unlimited)
+            )
+        assert None not in results.values(), results
+        assert authorized == [threading.main_thread()], authorized
+        check_threads(revoked, tweet_session)
+
+        # Running the same queue again posts nothing.
+        reset_api()
+        with redirect_stdout(io.StringIO()):
+            results = publisher.publish_batch(queue, 8)
+        assert SlowAPI.requests == 0 and not any(results.values()), results
+        print("ok")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import NOTES_DIR, POST_SESSION_RECAP_QS  # noqa: E402
+from search import search_sessions  # noqa: E402
+from store import (  # noqa: E402
+    add_session,
+    get_db,
+    get_sessions,
+    get_state,
+    migrate_legacy,
+    reindex,
+)
+
+from corpus import timed, write_notes  # noqa: E402
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+RUNS = 20
+QUERIES = [
+    ("sqlite", None),
+    ("sqlite parser", None),
+    ('"review notes"', None),
+    ('"review notes" deploy', POST_SESSION_RECAP_QS[1]),
+    ("dep*", None),
+]
+
+
+def best_of(label, fn, *args):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - start)
+    print(f"{label:<44} {min(samples) * 1000:10.2f} ms")
+    return result
+
+
+def grep_notes(words):
+    # What finding a session looked like before: read every note.
+    sessions = []
+    for dirpath, _, filenames in os.walk(NOTES_DIR):
+        for filename in filenames:
+            with open(os.path.join(dirpath, filename)) as f:
+                text = f.read()
+            if all(word in text for word in words):
+                sessions.append(filename)
+    return sessions
+
+
+def scan_answers(query, question):
+    # The same matches found the slow way, straight from the answers table.
+    phrases = [
+        (phrase or word.rstrip("*")).split()
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query)
+    ]
+    prefix = query.endswith("*")
+    sessions = set()
+    for row in get_db().execute("SELECT session, question, text FROM answers"):
+        if question is not None and row["question"] != question:
+            continue
+        tokens = re.findall(r"\w+", row["text"].lower())
+        if all(contains(tokens, phrase, prefix) for phrase in phrases):
+            sessions.add(row["session"])
+    return sessions
+
+
+def contains(tokens, phrase, prefix):
+    for i in range(len(tokens) - len(phrase) + 1):
+        window = tokens[i : i + len(phrase)]
+        if window[:-1] == phrase[:-1] and (
+            window[-1].startswith(phrase[-1]) if prefix else window[-1] == phrase[-1]
+        ):
+            return True
+    return False
+
+
+def found(query, question=None):
+    results = search_sessions(query, question, limit=None)
+    return {result["session"] for result in results}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        write_notes(SESSIONS)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            migrate_legacy()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{'import and index every note':<44} {elapsed:10.2f} ms")
+        get_db().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"store with index: {os.path.getsize('sessions.db') / 1e6:.1f} MB")
+
+        timed(
+            "grep every note for sqlite parser",
+            grep_notes,
+            ["sqlite", "parser"],
+            width=44,
+        )
+        for query, question in QUERIES:
+            label = f"search {query}" + (" (one question)" if question else "")
+            best_of(label, search_sessions, query, question)
+        for query, question in QUERIES:
+            assert found(query, question) == scan_answers(query, question), query
+
+        # A note written by prompt_user is searchable straight away.
+        with get_state().transaction() as state:
+            number = state.next_session_number()
+            path = os.path.join(NOTES_DIR, "new.md")
+            with open(path, "w") as f:
+                f.write("• wrote the zeppelin importer\n")
+            add_session(
+                number,
+                time.time() - 60,
+                time.time(),
+                "•",
+                {POST_SESSION_RECAP_QS[0]: ["• wrote the zeppelin importer"]},
+                path,
+            )
+        assert found("zeppelin") == {number}
+
+        # A note edited by hand is picked up by the reindex pass.
+        (row,) = get_sessions(7, 7)
+        with open(row["path"]) as f:
+            text = f.read()
+        with open(row["path"], "w") as f:
+            f.write(text.replace("\n• ", "\n• quokka ", 1))
+        assert found("quokka") == set()
+        timed("reindex after one edit", reindex, width=44)
+        assert found("quokka") == {7}
+        os.remove(row["path"])
+        reindex()
+        assert found("quokka") == set()
+        print("search results match a scan of every answer")
+
+
+if __name__ == "__main__":
+    main()
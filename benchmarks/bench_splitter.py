@@ -0,0 +1,61 @@
+import os
+import re
+import sys
+import time
+from textwrap import wrap
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import POST_SESSION_RECAP_QS  # noqa: E402
+from x_api.splitter import (  # noqa: E402
+    TWEET_WEIGHT_LIMIT,
+    split_thread,
+    weighted_length,
+)
+
+from corpus import collected_note  # noqa: E402
+
+SESSIONS = 2_000
+
+
+def textwrap_split(text):
+    # The splitter the tweet action used before.
+    text = re.sub(r"\*\*", "", text.lstrip("\n"))
+    return wrap(text, 280, replace_whitespace=False, drop_whitespace=False)
+
+
+def main():
+    note = collected_note(SESSIONS)
+    print(f"note: {len(note) / 1e6:.1f} MB, {note.count(chr(10))} lines")
+
+    start = time.perf_counter()
+    old = textwrap_split(note)
+    old_elapsed = time.perf_counter() - start
+    over = sum(1 for post in old if weighted_length(post) > TWEET_WEIGHT_LIMIT)
+    print(
+        f"textwrap: {len(old)} posts in {old_elapsed * 1000:.0f} ms, "
+        f"{over} over the weighted limit"
+    )
+
+    start = time.perf_counter()
+    new = split_thread(note)
+    new_elapsed = time.perf_counter() - start
+    assert all(weighted_length(post) <= TWEET_WEIGHT_LIMIT for post in new)
+    cut_lines = sum(
+        1 for post in new[1:] if not post.startswith(("•", *POST_SESSION_RECAP_QS))
+    )
+    print(
+        f"split_thread: {len(new)} posts in {new_elapsed * 1000:.0f} ms, "
+        f"{cut_lines} start mid-line"
+    )
+
+    start = time.perf_counter()
+    numbered = split_thread(note, numbered=True)
+    print(
+        f"split_thread numbered: {len(numbered)} posts in "
+        f"{(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only the tweet action is allowed to pull in.
+NETWORK_MODULES = {
+    "dotenv",
+    "oauthlib",
+    "requests",
+    "requests_oauthlib",
+    "urllib3",
+}
+# Modules only some other action needs, eg collect --processes, archive or
+# stats, which start, end and status must not pay for.
+DEFERRED_MODULES = {
+    "concurrent",
+    "csv",
+    "export",
+    "multiprocessing",
+    "note_archive",
+    "search",
+    "stats",
+    "zipfile",
+}
+COLD_START_ACTIONS = ["start", "end", "status"]
+# Everything the standalone status reader may import once the interpreter is up.
+STATUS_MODULES = {
+    "json",
+    "json.decoder",
+    "json.scanner",
+    "_json",
+    "json.encoder",
+    "constants",
+}
+RUNS = 10
+
+
+def imported_modules(args):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    # Maps module name -> (nesting depth, cumulative microseconds).
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            modules[name.strip()] = (depth, int(cumulative))
+    return modules
+
+
+def wall_time(args):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    failed = False
+    for action in COLD_START_ACTIONS:
+        args = ["main.py", action, "--help"]
+        modules = imported_modules(args)
+        leaked = sorted(
+            {
+                name.split(".")[0]
+                for name in modules
+                if name.split(".")[0] in NETWORK_MODULES or name.startswith("x_api")
+            }
+        )
+        total_ms = sum(us for depth, us in modules.values() if depth == 0) / 1000
+        print(
+            f"{action:>6}: {wall_time(args) * 1000:.1f} ms wall, "
+            f"{total_ms:.1f} ms importing {len(modules)} modules"
+        )
+        if leaked:
+            failed = True
+            print(f"        pulled in network modules: {", ".join(leaked)}")
+        # Whatever site-packages loads at interpreter startup isn't ours to defer.
+        names = list(modules)
+        own = names[names.index("site") + 1 :] if "site" in names else names
+        if eager := sorted({n for n in own if n.split(".")[0] in DEFERRED_MODULES}):
+            failed = True
+            print(f"        imported eagerly: {", ".join(eager)}")
+
+    # The status reader is meant to run every second from a prompt or status bar.
+    args = ["session_state.py"]
+    modules = list(imported_modules(args))
+    own = modules[modules.index("site") + 1 :] if "site" in modules else modules
+    print(
+        f"status: {wall_time(args) * 1000:.1f} ms wall "
+        f"(main.py status: {wall_time(["main.py", "status"]) * 1000:.1f} ms)"
+    )
+    if extra := sorted(set(own) - STATUS_MODULES):
+        failed = True
+        print(f"        session_state.py imported: {", ".join(extra)}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
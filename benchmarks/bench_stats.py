@@ -0,0 +1,99 @@
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stats import compute_stats, render_table  # noqa: E402
+from store import get_db, get_session_columns  # noqa: E402
+
+from corpus import timed  # noqa: E402
+
+SESSIONS = 50_000
+FIRST_SESSION = datetime(2000, 1, 1, 9)
+
+
+def insert_sessions(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    start = FIRST_SESSION
+    for number in range(1, count + 1):
+        # A few sessions a day with the odd day off, so streaks get broken.
+        start += timedelta(hours=rng.choice([2, 3, 5, 8, 20, 40]))
+        duration = rng.randint(10 * 60, 180 * 60)
+        rows.append((number, start.timestamp(), start.timestamp() + duration, duration))
+    db = get_db()
+    with db:
+        db.executemany(
+            "INSERT INTO sessions (number, start_time, end_time, duration, divider, path) "
+            "VALUES (?, ?, ?, ?, '•', '')",
+            rows,
+        )
+
+
+def row_stats(period, limit, today):
+    # The obvious version: one datetime and one dict lookup per row.
+    rows = (
+        get_db()
+        .execute("SELECT start_time, duration FROM sessions ORDER BY start_time")
+        .fetchall()
+    )
+    groups = {}
+    days = set()
+    for start_time, duration in rows:
+        day = datetime.fromtimestamp(start_time).date()
+        days.add(day.toordinal())
+        if period == "day":
+            key = day.toordinal()
+        elif period == "week":
+            key = (day.toordinal() - 1) // 7
+        else:
+            key = day.year * 12 + day.month - 1
+        sessions, total = groups.get(key, (0, 0))
+        groups[key] = (sessions + 1, total + duration)
+    durations = sorted(d for _, d in rows)
+    longest = current = 0
+    for ordinal in sorted(days):
+        current = current + 1 if ordinal - 1 in days else 1
+        longest = max(longest, current)
+    return {
+        "periods": [(k, *groups[k]) for k in sorted(groups)][-limit:],
+        "p50": durations[(len(durations) * 50 + 99) // 100 - 1],
+        "longest_streak": longest,
+    }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        insert_sessions(SESSIONS)
+        print(f"{SESSIONS} synthetic sessions")
+        today = date.today().toordinal()
+
+        for period in ["day", "week", "month"]:
+            expected, row_time = timed(
+                f"per-row {period} stats", row_stats, period, 14, today
+            )
+
+            def columnar():
+                starts, durations = get_session_columns()
+                return compute_stats(starts, durations, period, 14, today)
+
+            stats, columnar_time = timed(f"columnar {period} stats", columnar)
+            assert [(p["sessions"], p["total"]) for p in stats["periods"]] == [
+                (sessions, total) for _, sessions, total in expected["periods"]
+            ]
+            assert stats["percentiles"][50] == expected["p50"]
+            assert stats["streaks"]["longest"] == expected["longest_streak"]
+            print(f"speedup: {row_time / columnar_time:.1f}x")
+
+        starts, durations = timed("load columns", get_session_columns)[0]
+        timed("compute day stats", compute_stats, starts, durations, "day", 14, today)
+        print()
+        print(render_table(compute_stats(starts, durations, "month", 6, today)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing  # noqa: E402
+
+SPANS = 1_000_000
+
+
+def per_span(label):
+    start = time.perf_counter()
+    for _ in range(SPANS):
+        with tracing.span("phase"):
+            pass
+    ns = (time.perf_counter() - start) / SPANS * 1e9
+    print(f"{label:<28} {ns:8.0f} ns per span")
+    return ns
+
+
+def bare():
+    start = time.perf_counter()
+    for _ in range(SPANS):
+        pass
+    return (time.perf_counter() - start) / SPANS * 1e9
+
+
+def main():
+    loop = bare()
+    disabled = per_span("disabled") - loop
+    tracing.enable()
+    per_span("enabled")
+    tracing.enable(trace_events=True)
+    per_span("enabled with trace events")
+    # The instrumented phases take milliseconds; a disabled span must not show up.
+    assert disabled < 1_000, disabled
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+import signal
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from daemon import SessionDaemon  # noqa: E402
+from daemon_client import send_command  # noqa: E402
+from hosts import read_blocked_domains  # noqa: E402
+from session_state import describe_state, read_state  # noqa: E402
+
+HOSTS = "127.0.0.1 localhost\n::1 localhost\n"
+DAEMON = (
+    "import sys; sys.path.insert(0, {repo!r}); from daemon import run_daemon; "
+    "run_daemon({socket!r}, {hosts!r}, {state!r}, flush_dns=False)"
+)
+# 'end' without the socket signals the daemon, which clears the state file; the
+# pause lets it do so before 'end' goes on to write the notes.
+END = """
+import sys, time
+sys.path.insert(0, {repo!r})
+import main
+remove_sites = main.remove_sites
+main.remove_sites = lambda: (time.sleep(0.5), remove_sites())
+main.end_session("•")
+"""
+# One line for each recap question, then the empty line that ends it.
+ANSWERS = "ended from a hook\n\n" * 3
+
+
+def start_daemon(socket_path, hosts_path, state_path):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            DAEMON.format(
+                repo=REPO, socket=socket_path, hosts=hosts_path, state=state_path
+            ),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 10
+    while send_command("status", socket_path) is None:
+        assert process.poll() is None, "daemon exited during startup"
+        assert time.time() < deadline, "daemon did not start"
+        time.sleep(0.05)
+    return process
+
+
+def timed_command(command, socket_path, **fields):
+    start = time.perf_counter()
+    response = send_command(command, socket_path, **fields)
+    return response, (time.perf_counter() - start) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs("blocklists")
+        with open("blocklists/test.txt", "w") as f:
+            f.write("reddit.com\nnews.ycombinator.com\n")
+        hosts_path = os.path.join(tmp, "hosts")
+        with open(hosts_path, "w") as f:
+            f.write(HOSTS)
+        socket_path = os.path.join(tmp, "daemon.sock")
+        state_path = os.path.join(tmp, "state.json")
+
+        process = start_daemon(socket_path, hosts_path, state_path)
+        try:
+            assert send_command("status", socket_path) == {"active": False}
+            assert "error" in send_command("bogus", socket_path)
+            for bad in [
+                {"session": "1"},
+                {"session": 1, "duration": "10"},
+                {"session": 1, "sites": "example"},
+                {"session": 1, "backend": "pf"},
+                {"session": 1, "colour": "red"},
+            ]:
+                response = send_command("start", socket_path, **bad)
+                assert response == {"error": "Invalid arguments."}, (bad, response)
+            # Profile names off the socket never reach the cache as paths.
+            response = send_command(
+                "start", socket_path, session=1, profiles=["../../tmp/x"], duration=1
+            )
+            assert response == {"error": "Unknown profile: ../../tmp/x."}, response
+            assert not os.path.exists(".blocklist_cache/../../tmp/x.bin")
+            assert read_state(state_path) is None
+
+            session, start_ms = timed_command(
+                "start",
+                socket_path,
+                session=1,
+                sites=["example", ""],
+                profiles=["test"],
+                duration=10,
+            )
+            assert session["active"] and session["session"] == 1, session
+            assert session["domains"] == 6, session
+            assert "www.example.com" in read_blocked_domains(hosts_path)
+            assert "error" in send_command("start", socket_path, session=2)
+
+            extended = send_command("extend", socket_path, minutes=5)
+            assert extended["end_time"] == session["end_time"] + 300, extended
+            assert 890 < send_command("status", socket_path)["remaining"] <= 900
+            # `status` reads the same session from the state file, without the socket.
+            state = read_state(state_path)
+            assert state["end_time"] == extended["end_time"], state
+            assert len(state["domains"]) == 6 and state["mode"] == "timed", state
+            assert "left (until" in describe_state(state), describe_state(state)
+
+            ended, end_ms = timed_command("end", socket_path)
+            assert ended["start_time"] == session["start_time"], ended
+            assert read_blocked_domains(hosts_path) == []
+            with open(hosts_path) as f:
+                assert f.read() == HOSTS
+            assert "error" in send_command("end", socket_path)
+            assert read_state(state_path) is None
+
+            # A timed session unblocks on its own and waits for 'end' to write notes.
+            send_command(
+                "start", socket_path, session=2, sites=["example"], duration=0.005
+            )
+            assert read_blocked_domains(hosts_path)
+            time.sleep(0.6)
+            status = send_command("status", socket_path)
+            assert status["session"] == 2 and not status["active"], status
+            assert read_blocked_domains(hosts_path) == []
+            assert read_state(state_path)["finished"]
+            # Its times are kept for 'end' until it has been run.
+            retry = send_command("start", socket_path, session=3, duration=10)
+            assert "error" in retry and read_state(state_path)["session"] == 2, retry
+            assert send_command("end", socket_path)["session"] == 2
+
+            latencies = [timed_command("status", socket_path)[1] for _ in range(200)]
+            print(f"start: {start_ms:.2f} ms, end: {end_ms:.2f} ms")
+            print(
+                f"status: median {statistics.median(latencies):.2f} ms, "
+                f"max {max(latencies):.2f} ms over {len(latencies)} requests"
+            )
+
+            # With no sites or profiles, the default profile, as in the foreground.
+            with open("default_sites.txt", "w") as f:
+                f.write("youtube\n")
+            session = send_command("start", socket_path, session=3, duration=10)
+            assert session["blocked"] == ["default profile"], session
+            assert "www.youtube.com" in read_blocked_domains(hosts_path)
+            send_command("end", socket_path)
+            os.remove("default_sites.txt")
+
+            # 'end' run where the socket can't be reached still writes the notes.
+            send_command("start", socket_path, session=4, sites=["example"])
+            ended = subprocess.run(
+                [sys.executable, "-c", END.format(repo=REPO)],
+                input=ANSWERS,
+                env=dict(
+                    os.environ,
+                    DWT_SESSION_INFO_FILE=state_path,
+                    DWT_HOSTS_PATH=hosts_path,
+                    DWT_CLIPBOARD_COMMAND="",
+                    DWT_FLUSH_DNS_COMMAND="",
+                ),
+                capture_output=True,
+                text=True,
+            )
+            assert ended.returncode == 0, ended.stderr
+            assert "There must be an active session" not in ended.stdout, ended.stdout
+            assert send_command("status", socket_path) == {"active": False}
+            assert read_blocked_domains(hosts_path) == []
+            db = sqlite3.connect("sessions.db")
+            assert db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 1
+            db.close()
+
+            # Stopping the daemon mid-session still leaves a clean hosts file.
+            send_command(
+                "start", socket_path, session=3, sites=["example"], continuous=True
+            )
+            assert read_blocked_domains(hosts_path)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            assert process.wait(10) == 0
+        assert read_blocked_domains(hosts_path) == []
+        assert not os.path.exists(socket_path)
+        assert read_state(state_path) is None
+
+        # A start that can't block leaves no session behind.
+        daemon = SessionDaemon(
+            os.path.join(tmp, "missing", "hosts"), state_path, flush_dns=False
+        )
+        response = daemon.start(1, sites=["example"], duration=10)
+        assert "error" in response and daemon.session is None, response
+        assert read_state(state_path) is None
+        print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StandInAPI(BaseHTTPRequestHandler):
+    # Answers POST /2/tweets, failing with whatever status is next in `faults`.
+    protocol_version = "HTTP/1.1"
+    faults = []
+    tweets = []
+    requests = 0
+    slow = 0.5
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        cls.requests += 1
+        status = cls.faults.pop(0) if cls.faults else 201
+        if status == "slow":
+            # Created, but answered only after the client has given up.
+            time.sleep(cls.slow)
+            status = 201
+        headers = {}
+        if status == 201:
+            tweet_id = str(1000 + len(cls.tweets))
+            reply_to = body.get("reply", {}).get("in_reply_to_tweet_id")
+            cls.tweets.append((tweet_id, body["text"], reply_to))
+            data = {"data": {"id": tweet_id, "text": body["text"]}}
+        else:
+            data = {"title": "Injected failure", "status": status}
+            if status == 429:
+                headers["x-rate-limit-reset"] = str(int(time.time()))
+        payload = json.dumps(data).encode()
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped waiting for a slow answer.
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        # Must be set before x_api is imported; constants read it once.
+        os.environ["DWT_X_API_BASE"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ["HOME"] = tmp
+        os.environ["X_CLIENT_ID"] = "consumer-key"
+        os.environ["X_CLIENT_SECRET"] = "consumer-secret"
+
+        from x_api import auth, tweet_session
+
+        auth.write_cached_tokens("consumer-key", "token", "token-secret")
+        tweet_session.BACKOFF_BASE = 0.01
+        tweet_session.RATE_LIMIT_MARGIN = 0.01
+
+        note_path = os.path.join(tmp, "session_01.md")
+        with open(note_path, "w") as f:
+            for i in range(20):
+                f.write(
+                    f"• Worked through part {i} of the refactor, then wrote it up.\n"
+                )
+        with open(note_path) as f:
+            tweets = tweet_session.split_into_tweets(f.read())
+        assert len(tweets) >= 4, len(tweets)
+
+        # 429, 503 and 500 are retried; the 400 after the third post kills the run.
+        StandInAPI.faults = [429, 503, 201, 500, 201, 201, 400]
+        start = time.perf_counter()
+        try:
+            tweet_session.post_thread(tweets, note_path)
+        except Exception as e:
+            print(f"first run stopped: {e}")
+        else:
+            raise AssertionError("the injected 400 should stop the thread")
+        assert len(StandInAPI.tweets) == 3
+
+        tweet_session.resume_thread()
+        elapsed = time.perf_counter() - start
+
+        posted = StandInAPI.tweets
+        assert [
+            text for _, text, _ in posted
+        ] == tweets, "tweets were duplicated or lost"
+        assert posted[0][2] is None
+        for (previous_id, _, _), (_, _, reply_to) in zip(posted, posted[1:]):
+            assert reply_to == previous_id, "reply chain is broken"
+        assert tweet_session.get_unfinished_thread() is None
+        print(
+            f"{len(tweets)} posts, {StandInAPI.requests} requests, "
+            f"{len(StandInAPI.tweets)} tweets created in {elapsed * 1000:.0f} ms"
+        )
+
+        # Editing a stopped note leaves a thread that can't be resumed; posting
+        # the note again starts afresh and drops it, and so does --discard.
+        for forget in ["post again", "discard"]:
+            StandInAPI.faults = [201, 400]
+            try:
+                tweet_session.post_thread(tweets, note_path, verbose=False)
+            except Exception:
+                pass
+            assert tweet_session.get_unfinished_thread()["posted"] == 1
+            edited = [tweets[0] + " (edited)", *tweets[1:]]
+            with redirect_stdout(io.StringIO()):
+                if forget == "discard":
+                    tweet_session.discard_thread()
+                else:
+                    tweet_session.post_thread(edited, note_path)
+            assert tweet_session.get_unfinished_thread() is None, forget
+            print(f"stale thread forgotten by {forget}")
+
+        # A post created but answered too late is not retried: a retry could
+        # duplicate it, so the thread stops for someone to check.
+        StandInAPI.requests = 0
+        StandInAPI.faults = ["slow"]
+        tweet_session.REQUEST_TIMEOUT = StandInAPI.slow / 5
+        created = len(StandInAPI.tweets)
+        try:
+            tweet_session.post_tweet({"text": "answered late"})
+        except Exception as e:
+            print(f"read timeout: {e}")
+        else:
+            raise AssertionError("a read timeout should stop the thread")
+        time.sleep(StandInAPI.slow)
+        assert StandInAPI.requests == 1, StandInAPI.requests
+        assert len(StandInAPI.tweets) == created + 1
+        tweet_session.REQUEST_TIMEOUT = 30
+
+        # A server that never recovers is given up on after MAX_ATTEMPTS requests.
+        StandInAPI.requests = 0
+        StandInAPI.faults = [503] * 100
+        try:
+            tweet_session.post_tweet({"text": "never posted"})
+        except Exception as e:
+            print(f"persistent 503: {e}")
+        assert StandInAPI.requests == tweet_session.MAX_ATTEMPTS
+        print("ok")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from x_api.splitter import (  # noqa: E402
+    TWEET_WEIGHT_LIMIT,
+    parse_units,
+    split_thread,
+    weighted_length,
+)
+
+NOTES = 300
+PIECES = [
+    "focus",
+    "refactor",
+    "parser",
+    "sqlite",
+    "日本語のメモ",
+    "테스트",
+    "café",
+    "\U0001f680",
+    "\U0001f44d\U0001f3fd",
+    "\U0001f468‍\U0001f469‍\U0001f467",
+    "\U0001f1fa\U0001f1f8",
+    "https://example.com/some/long/path?q=1",
+    "www.example.org",
+    "youtube.com",
+    "github.io/x",
+    "x" * 300,
+    "**bold**",
+]
+# How X counts some lines, from twitter-text's rules rather than the splitter's.
+KNOWN_WEIGHTS = [
+    ("youtube.com", 23),
+    ("see github.io/x.", 4 + 23 + 1),
+    ("example.co and example.de", 23 + 5 + 10),
+    ("(https://example.com/x), then", 1 + 23 + 7),
+    ("mail a@b.com or #tag.com", 5 + 7 + 4 + 8),
+]
+
+
+def random_note(rng):
+    lines = []
+    for _ in range(rng.randint(1, 40)):
+        shape = rng.random()
+        words = " ".join(rng.choices(PIECES, k=rng.randint(1, 40)))
+        if shape < 0.15:
+            lines.append(f"**{words[:40]}**")
+        elif shape < 0.25:
+            lines.append("")
+        elif shape < 0.7:
+            lines.append(f"• {words}")
+        else:
+            lines.append(words)
+    return "\n".join(lines)
+
+
+def greedy_count(units, limit):
+    # Greedy packing gives the fewest posts; the splitter must match it.
+    posts = 0
+    used = None
+    for text, weight, _, separator in units:
+        if used is not None and used + len(separator) + weight <= limit:
+            used += len(separator) + weight
+        else:
+            posts += 1
+            used = weight
+    return posts
+
+
+def squash(text):
+    return "".join(text.replace("**", "").split())
+
+
+def main():
+    for text, weight in KNOWN_WEIGHTS:
+        assert weighted_length(text) == weight, (text, weighted_length(text))
+
+    rng = random.Random(0)
+    posts = 0
+    for _ in range(NOTES):
+        note = random_note(rng)
+        limit = rng.choice([TWEET_WEIGHT_LIMIT, 140, 60])
+        parts = split_thread(note, limit)
+        for part in parts:
+            assert weighted_length(part) <= limit, (limit, part)
+        assert squash("".join(parts)) == squash(note), "content was lost"
+        assert len(parts) == greedy_count(parse_units(note, limit), limit)
+
+        numbered = split_thread(note, limit, numbered=True)
+        for i, part in enumerate(numbered, 1):
+            assert weighted_length(part) <= limit, (limit, part)
+            assert part.endswith(f"\n{i}/{len(numbered)}")
+        posts += len(parts)
+    print(f"{NOTES} random notes split into {posts} posts, all within the limit")
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
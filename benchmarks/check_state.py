@@ -0,0 +1,95 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROCESSES = 16
+SESSIONS = 10
+DAYS = 5
+# Every worker ends SESSIONS sessions and collects DAYS days, interleaved, as
+# soon as the go file appears, so their store writes overlap as much as they can.
+WORKER = """
+import io, os, sys, time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+sys.path.insert(0, {repo!r})
+import main
+while not os.path.exists("go"):
+    time.sleep(0.001)
+with redirect_stdout(io.StringIO()):
+    for i in range({sessions}):
+        main.prompt_user(datetime.now() - timedelta(minutes=30), "•")
+        if i < {days}:
+            main.collect_notes(1, 1, "•")
+"""
+# One line for each recap question, then the empty line that ends it.
+ANSWERS = "stress tested the store\n\n" * 3
+
+
+def run_workers(tmp, count, sessions, days):
+    env = dict(os.environ, DWT_CLIPBOARD_COMMAND="", DWT_FLUSH_DNS_COMMAND="")
+    workers = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                WORKER.format(repo=REPO, sessions=sessions, days=days),
+            ],
+            cwd=tmp,
+            env=env,
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(count)
+    ]
+    for worker in workers:
+        worker.stdin.write(ANSWERS * sessions)
+        worker.stdin.close()
+    start = time.perf_counter()
+    with open(os.path.join(tmp, "go"), "w"):
+        pass
+    for worker in workers:
+        assert worker.wait(60) == 0, worker.stderr.read()
+    os.remove(os.path.join(tmp, "go"))
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        # A first session, so every worker has something to collect.
+        run_workers(tmp, 1, 1, 0)
+        elapsed = run_workers(tmp, PROCESSES, SESSIONS, DAYS)
+        sessions = 1 + PROCESSES * SESSIONS
+        days = PROCESSES * DAYS
+        print(
+            f"{PROCESSES} processes ended {sessions - 1} sessions and collected "
+            f"{days} days in {elapsed:.2f} s"
+        )
+
+        db = sqlite3.connect(os.path.join(tmp, "sessions.db"))
+        numbers = [n for (n,) in db.execute("SELECT number FROM sessions")]
+        assert sorted(numbers) == list(range(1, sessions + 1)), numbers
+        numbers = [n for (n,) in db.execute("SELECT number FROM days")]
+        assert sorted(numbers) == list(range(1, days + 1)), numbers
+        meta = {k: json.loads(v) for k, v in db.execute("SELECT key, value FROM meta")}
+        assert meta["session_number"] == sessions + 1, meta
+        assert meta["day_number"] == days, meta
+
+        # Every note is its own file and says the number it was stored under.
+        for number, path in db.execute("SELECT number, path FROM sessions"):
+            with open(os.path.join(tmp, path)) as f:
+                assert f"\nsession: {number}\n" in f.read(), path
+        for number, path in db.execute("SELECT number, path FROM days"):
+            with open(os.path.join(tmp, path)) as f:
+                assert f.read().startswith(f"**Day {number}**"), path
+        print("no session or day number was handed out twice")
+
+
+if __name__ == "__main__":
+    main()
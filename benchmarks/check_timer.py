@@ -0,0 +1,138 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer import MAX_WAIT, SessionTimer  # noqa: E402
+
+HOUR = 3600
+
+
+class FakeClock:
+    # Stands in for time.time and Event.wait; a wait jumps straight to its timeout.
+    def __init__(self, suspend_at=None, suspend_for=0):
+        self.now = 0.0
+        self.waits = []
+        self.suspend_at = suspend_at
+        self.suspend_for = suspend_for
+        self.timer = None
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        if timeout is None:
+            # Nothing but a signal ends a continuous session.
+            self.now += 10 * HOUR
+            self.timer.stop()
+            return
+        if (
+            self.suspend_at is not None
+            and self.now <= self.suspend_at < self.now + timeout
+        ):
+            # The machine sleeps mid-wait; the wait itself doesn't see the lost time.
+            self.now += self.suspend_for
+            self.suspend_at = None
+        self.now += timeout
+
+
+def make_timer(clock, end_time, reminders, fired):
+    timer = SessionTimer(
+        end_time,
+        [
+            (before, lambda remaining, b=before: fired.append((b, remaining)))
+            for before in reminders
+        ],
+        clock=clock,
+        wait=clock.wait,
+    )
+    clock.timer = timer
+    return timer
+
+
+def check_timed():
+    clock = FakeClock()
+    fired = []
+    timer = make_timer(clock, 8 * HOUR, [300, 60], fired)
+    assert timer.run() is True
+    assert clock.now == 8 * HOUR
+    assert fired == [(300, 300), (60, 60)], fired
+    # One wakeup per reminder plus the deadline, and one per MAX_WAIT to check
+    # the wall clock.
+    assert all(timeout <= MAX_WAIT for timeout in clock.waits), clock.waits
+    assert timer.wakeups <= 8 * HOUR // MAX_WAIT + 2, timer.wakeups
+    print(f"8 hour timed session: {timer.wakeups} wakeups (sleep loop: {8 * HOUR})")
+
+
+def check_continuous():
+    clock = FakeClock()
+    timer = make_timer(clock, None, [], [])
+    assert timer.run() is False
+    assert clock.waits == [None]
+    assert timer.wakeups == 1
+    print(
+        f"10 hour continuous session: {timer.wakeups} wakeup (sleep loop: {10 * HOUR})"
+    )
+
+
+def check_suspend():
+    # A wait doesn't count time spent suspended, so it wakes late; the timer then
+    # works from the wall clock and still ends the session at its deadline.
+    clock = FakeClock(suspend_at=HOUR, suspend_for=HOUR // 2)
+    fired = []
+    timer = make_timer(clock, 2 * HOUR, [300, 60], fired)
+    assert timer.run() is True
+    assert clock.now == 2 * HOUR, clock.now
+    assert fired == [(300, 300), (60, 60)], fired
+
+    # Asleep past the end: the session ends on the first check after the resume,
+    # and the reminders that are no longer true are dropped.
+    clock = FakeClock(suspend_at=HOUR, suspend_for=2 * HOUR)
+    fired = []
+    timer = make_timer(clock, 2 * HOUR, [300, 60], fired)
+    assert timer.run() is True
+    assert 3 * HOUR < clock.now <= 3 * HOUR + MAX_WAIT, clock.now
+    assert fired == [], fired
+
+    # Waking 200 seconds before the end still prints both reminders, on time
+    # for the second one.
+    clock = FakeClock(suspend_at=2 * HOUR - 400, suspend_for=100)
+    fired = []
+    timer = make_timer(clock, 2 * HOUR, [300, 60], fired)
+    assert timer.run() is True
+    assert clock.now == 2 * HOUR, clock.now
+    assert fired == [(300, 200), (60, 60)], fired
+    print(f"session with a suspend: {timer.wakeups} wakeups")
+
+
+def check_extend():
+    clock = FakeClock()
+    fired = []
+    extended = []
+    timer = make_timer(clock, HOUR, [300], fired)
+
+    def wait(timeout):
+        if fired and not extended:
+            extended.append(True)
+            timer.extend(HOUR)
+        clock.wait(timeout)
+
+    timer.wait = wait
+    assert timer.run() is True
+    assert clock.now == 2 * HOUR
+    # The reminder fires again for the new deadline.
+    assert fired == [(300, 300), (300, 300)], fired
+    print(f"extended session: {timer.wakeups} wakeups")
+
+
+def main():
+    check_timed()
+    check_continuous()
+    check_suspend()
+    check_extend()
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
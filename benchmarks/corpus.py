@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import NOTES_DIR, POST_SESSION_RECAP_QS  # noqa: E402
+from notes import render_session_note  # noqa: E402
+
+FIRST_SESSION = datetime(2020, 1, 1, 9)
+WORDS = "refactor parser tests deploy review notes sqlite hosts focus docs".split()
+EXTRAS = ["https://example.com/pull/1234", "youtube.com", "\U0001f680", "日本語"]
+
+
+def timed(label, fn, *args, width=32):
+    # Runs fn once and prints how long it took, the label padded to `width`.
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<{width}} {elapsed * 1000:10.1f} ms")
+    return result, elapsed
+
+
+def write_notes(count, seed=0):
+    # Session notes as prompt_user writes them, into NOTES_DIR under the cwd.
+    rng = random.Random(seed)
+    os.makedirs(NOTES_DIR, exist_ok=True)
+    paths = []
+    for number in range(1, count + 1):
+        answers = {
+            q: "\n".join(
+                f"• {' '.join(rng.choices(WORDS, k=rng.randint(3, 12)))}"
+                for _ in range(rng.randint(1, 6))
+            )
+            for q in POST_SESSION_RECAP_QS
+        }
+        minutes = rng.randint(10, 180)
+        duration = f"{minutes // 60} hours, {minutes % 60} minutes"
+        start_time = FIRST_SESSION + timedelta(hours=5 * number)
+        end_time = start_time + timedelta(minutes=minutes, seconds=rng.randint(0, 59))
+        path = os.path.join(NOTES_DIR, f"session_{number:02}.md")
+        with open(path, "w") as f:
+            f.write(
+                render_session_note(
+                    number, start_time, end_time, "•", duration, answers
+                )
+            )
+        paths.append(path)
+    return paths
+
+
+def write_hosts(path, lines):
+    with open(path, "w") as f:
+        f.write("127.0.0.1 localhost\n::1 localhost\n")
+        for i in range(lines):
+            f.write(f"0.0.0.0 ads{i}.tracker{i % 997}.example\n")
+
+
+def collected_note(sessions, seed=0):
+    # Shaped like a collect output: a heading per question, then many bullets.
+    rng = random.Random(seed)
+    lines = []
+    for question in POST_SESSION_RECAP_QS:
+        lines.append(f"**{question}**")
+        for _ in range(sessions):
+            words = rng.choices(WORDS, k=rng.randint(3, 40))
+            if rng.random() < 0.2:
+                words.append(rng.choice(EXTRAS))
+            lines.append(f"• {' '.join(words)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic note archive and hosts file to try the tracker on."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--sessions", type=int, default=1_000)
+    parser.add_argument("--hosts-lines", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    os.chdir(args.directory)
+    write_notes(args.sessions, args.seed)
+    write_hosts("hosts", args.hosts_lines)
+    print(
+        f"Wrote {args.sessions} notes to {os.path.join(args.directory, NOTES_DIR)} "
+        f"and a {args.hosts_lines}-line hosts file to {os.path.join(args.directory, 'hosts')}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+sys.path.insert(0, ROOT)
+
+SITES = ["youtube", "x", "facebook", "instagram"]
+# One line for the first recap question, then an empty answer to each.
+RECAP_ANSWERS = "benchmarked the tracker\n\n\n\n"
+
+
+def redirected_env(tmp):
+    # Everything the tracker touches outside its cwd, pointed into tmp.
+    return {
+        "DWT_HOSTS_PATH": os.path.join(tmp, "hosts"),
+        "DWT_SESSION_INFO_FILE": os.path.join(tmp, "session_info"),
+        "DWT_DAEMON_SOCKET": os.path.join(tmp, "daemon.sock"),
+        "DWT_CLIPBOARD_COMMAND": "",
+        "DWT_FLUSH_DNS_COMMAND": "",
+    }
+
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "runs": len(samples),
+    }
+
+
+def measure(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def run_cli(args, stdin=None):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"), *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(args)} failed:\n{result.stdout}")
+    return elapsed
+
+
+def bench_functions(sessions, durations, runs):
+    import main as tracker
+    from store import list_days
+    from x_api.tweet_session import split_into_tweets
+
+    results = {}
+    # The first collect also migrates the notes into a fresh store.
+    with redirect_stdout(io.StringIO()):
+        results["collect_notes (cold store)"] = measure(
+            lambda: tracker.collect_notes(1, sessions, "•"), 1
+        )
+        results["collect_notes"] = measure(
+            lambda: tracker.collect_notes(1, sessions, "•"), runs
+        )
+
+    block, remove = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        tracker.block_sites(SITES)
+        block.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        tracker.remove_sites()
+        remove.append(time.perf_counter() - start)
+    results["block_sites"] = summarize(block)
+    results["remove_sites"] = summarize(remove)
+
+    results[f"sum_durations ({len(durations)})"] = measure(
+        lambda: tracker.sum_durations(durations), runs
+    )
+
+    (collected,) = list_days(None, 1)
+    with open(collected["path"]) as f:
+        note = f.read()
+    results[f"split_into_tweets ({len(note) // 1000} KB)"] = measure(
+        lambda: split_into_tweets(note), runs
+    )
+    return results
+
+
+def bench_cli(sessions, socket_path, runs):
+    from daemon_client import send_command
+
+    samples = {}
+
+    def add(name, elapsed):
+        samples.setdefault(name, []).append(elapsed)
+
+    for _ in range(runs):
+        add("cli stats", run_cli(["stats"]))
+        add("cli migrate", run_cli(["migrate"]))
+        add(
+            "cli collect",
+            run_cli(
+                [
+                    "collect",
+                    "--collect-from",
+                    "1",
+                    "--to",
+                    str(sessions),
+                    "--divider",
+                    "•",
+                ]
+            ),
+        )
+        add("cli tweet --help", run_cli(["tweet", "--help"]))
+
+    # A real start/status/extend/end cycle through the session daemon.
+    start = time.perf_counter()
+    daemon = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "main.py"), "daemon"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        while send_command("status", socket_path) is None:
+            if daemon.poll() is not None:
+                raise RuntimeError("the session daemon exited during startup")
+            time.sleep(0.005)
+        add("cli daemon (until listening)", time.perf_counter() - start)
+        for _ in range(runs):
+            add(
+                "cli start",
+                run_cli(["start", "--sites", ",".join(SITES), "--duration", "60"]),
+            )
+            add("cli status", run_cli(["status"]))
+            add("cli extend", run_cli(["extend", "--duration", "5"]))
+            add("cli end", run_cli(["end", "--divider", "•"], RECAP_ANSWERS))
+    finally:
+        send_command("shutdown", socket_path)
+        daemon.wait(10)
+    return {name: summarize(values) for name, values in samples.items()}
+
+
+def current_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    dirty = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=no"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    return f"{commit}-dirty" if dirty else commit
+
+
+def print_results(results, baseline=None):
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        line = f"{name:<{width}} {result['median_ms']:10.1f} ms"
+        if baseline and name in baseline["results"]:
+            before = baseline["results"][name]["median_ms"]
+            line += f"  {before:10.1f} ms before  {result['median_ms'] / before:5.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the tracker's hot paths offline and save the results as JSON."
+    )
+    parser.add_argument("--sessions", type=int, default=1_000)
+    parser.add_argument("--hosts-lines", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--output",
+        help="Where to write the results (default benchmarks/results/<commit>.json).",
+    )
+    parser.add_argument(
+        "--compare", help="Results of an earlier run to print next to this one."
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = redirected_env(tmp)
+        # Set before the tracker is imported; constants reads them once.
+        os.environ.update(env)
+        os.chdir(tmp)
+
+        from corpus import write_hosts, write_notes
+
+        write_notes(args.sessions)
+        write_hosts(env["DWT_HOSTS_PATH"], args.hosts_lines)
+        rng = random.Random(0)
+        durations = [rng.randint(600, 10_800) for _ in range(100_000)]
+
+        results = bench_functions(args.sessions, durations, args.runs)
+        results.update(bench_cli(args.sessions, env["DWT_DAEMON_SOCKET"], args.runs))
+
+    report = {
+        "commit": current_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sessions": args.sessions,
+        "hosts_lines": args.hosts_lines,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_results(results, baseline)
+    print(f"Saved to {output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import hashlib
+import marshal
+import os
+import re
+import tempfile
+
+from constants import BLOCKLIST_CACHE_DIR, BLOCKLISTS_DIR, DEFAULT_SITES_FILE
+
+# Bump whenever normalization changes so stale caches get rebuilt.
+CACHE_VERSION = 1
+DEFAULT_PROFILE = "default"
+HOSTS_ADDRESSES = {"0.0.0.0", "127.0.0.1", "::", "::1"}
+SCHEME_PATTERN = re.compile(r"^[a-z][a-z0-9+.-]*://")
+DOMAIN_PATTERN = re.compile(
+    r"^(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?$"
+)
+
+
+def profile_path(name):
+    if name == DEFAULT_PROFILE:
+        return DEFAULT_SITES_FILE
+    return os.path.join(BLOCKLISTS_DIR, f"{name}.txt")
+
+
+def list_profiles():
+    profiles = [DEFAULT_PROFILE] if os.path.exists(DEFAULT_SITES_FILE) else []
+    if os.path.exists(BLOCKLISTS_DIR):
+        profiles.extend(
+            sorted(f[:-4] for f in os.listdir(BLOCKLISTS_DIR) if f.endswith(".txt"))
+        )
+    return profiles
+
+
+def normalize_line(line):
+    line = line.split("#", 1)[0].strip().lower()
+    if not line:
+        return []
+
+    names = line.split()
+    # Hosts-file formatted lists: "0.0.0.0 example.com other.example.com"
+    if names[0] in HOSTS_ADDRESSES:
+        names = names[1:]
+
+    domains = []
+    for name in names:
+        name = SCHEME_PATTERN.sub("", name).split("/", 1)[0].rsplit(":", 1)[0]
+        name = name.lstrip("*.").rstrip(".")
+        if "." not in name:
+            # Bare site names like "youtube" keep meaning youtube.com.
+            name = f"{name}.com"
+        if not name.isascii():
+            try:
+                name = name.encode("idna").decode()
+            except UnicodeError:
+                continue
+        if DOMAIN_PATTERN.match(name):
+            domains.append(name)
+    return domains
+
+
+def compile_domains(lines):
+    domains = set()
+    for line in lines:
+        for domain in normalize_line(line):
+            domains.add(domain)
+            # Hosts entries don't cover subdomains, so keep blocking the www variant.
+            if not domain.startswith("www."):
+                domains.add(f"www.{domain}")
+    return sorted(domains)
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            cached = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(cached, tuple) or len(cached) != 5:
+        return None
+    if cached[0] != CACHE_VERSION:
+        return None
+    return cached
+
+
+def _write_cache(cache_path, cached):
+    try:
+        os.makedirs(BLOCKLIST_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=BLOCKLIST_CACHE_DIR)
+        with os.fdopen(fd, "wb") as f:
+            f.write(marshal.dumps(cached))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is only an optimization; a read-only checkout still works.
+        pass
+
+
+def load_profile(name):
+    source = profile_path(name)
+    st = os.stat(source)
+    cache_path = os.path.join(BLOCKLIST_CACHE_DIR, f"{name}.bin")
+
+    cached = _read_cache(cache_path)
+    if cached and cached[1:3] == (st.st_mtime_ns, st.st_size):
+        return cached[4]
+
+    with open(source, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if cached and cached[3] == digest:
+        # Touched but not edited; keep the compiled domains and refresh the stamp.
+        domains = cached[4]
+    else:
+        domains = tuple(compile_domains(data.decode("utf-8", "replace").splitlines()))
+
+    _write_cache(
+        cache_path, (CACHE_VERSION, st.st_mtime_ns, st.st_size, digest, domains)
+    )
+    return domains
@@ -1,14 +1,42 @@
-HOSTS_PATH = "/etc/hosts"
+import os
+
+# Everything a session touches outside the project directory can be redirected,
+# eg to a temporary directory so the benchmarks run without root.
+HOSTS_PATH = os.environ.get("DWT_HOSTS_PATH", "/etc/hosts")
+DNS_SINKHOLE_ADDRESS = ("127.0.0.1", 53)
+DNS_UPSTREAM_ADDRESS = ("1.1.1.1", 53)
 HEADER_BLOCK = "# Added by work script\n"
 FOOTER_BLOCK = "End of section\n"
-SITE_PATTERN = r"(?:www\.)?([a-zA-Z0-9-]+)\.com"
-SESSION_INFO_FILE = "/tmp/site_blocker_session_info"
-TIME_FORMAT = "%m/%d/%y, %H:%M:%S"
-NOTES_DIR = "session_notes"
+SESSION_INFO_FILE = os.environ.get(
+    "DWT_SESSION_INFO_FILE", "/tmp/site_blocker_session_info"
+)
+DAEMON_SOCKET = os.environ.get("DWT_DAEMON_SOCKET", "/tmp/deep_work_tracker.sock")
+# Set either to an empty string to skip it.
+CLIPBOARD_COMMAND = os.environ.get("DWT_CLIPBOARD_COMMAND", "pbcopy")
+FLUSH_DNS_COMMAND = os.environ.get(
+    "DWT_FLUSH_DNS_COMMAND", "sudo killall -HUP mDNSResponder"
+)
+# Seconds before the end of a timed session at which to print the time left.
+SESSION_REMINDERS = [5 * 60, 60]
+NOTES_DIR = os.environ.get("DWT_NOTES_DIR", "session_notes")
 SESSION_TRACKER_FILE = "session_tracker.json"
+SESSION_DB_FILE = "sessions.db"
 NO_SITES_STR = "No sites entered to block."
 DEFAULT_SITES_FILE = "default_sites.txt"
-COLLECTED_SESSIONS_DIR = "collected_sessions"
+BLOCKLISTS_DIR = "blocklists"
+BLOCKLIST_CACHE_DIR = ".blocklist_cache"
+ARCHIVES_DIR = "archives"
+# Defined here rather than in stats.py and export.py, so the argument parser
+# doesn't import them for every action.
+STATS_PERIODS = ["day", "week", "month"]
+EXPORT_FORMATS = ["jsonl", "csv"]
+COLLECTED_SESSIONS_DIR = os.environ.get(
+    "DWT_COLLECTED_SESSIONS_DIR", "collected_sessions"
+)
+# OAuth tokens for posting to X; "~" is the user who runs the tweet action.
+X_CREDENTIALS_FILE = "~/.config/deep-work-tracker/x_credentials.json"
+# Point at a stand-in server to try posting without touching the real API.
+X_API_BASE = os.environ.get("DWT_X_API_BASE", "https://api.twitter.com")
 POSSIBLE_DIVIDERS = ["\u2022", ">", "-"]
 
 # UPDATE THIS DEPENDING ON THE QUESTIONS YOU WANT TO ANSWER
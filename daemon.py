@@ -0,0 +1,301 @@
+import asyncio
+import inspect
+import json
+import os
+import signal
+import threading
+import time
+
+from blocklists import DEFAULT_PROFILE, compile_domains, list_profiles, load_profile
+from constants import (
+    DAEMON_SOCKET,
+    DEFAULT_SITES_FILE,
+    DNS_SINKHOLE_ADDRESS,
+    HOSTS_PATH,
+    SESSION_INFO_FILE,
+    SESSION_REMINDERS,
+)
+from hosts import update_blocked_domains
+from session_state import clear_state, read_state, write_state
+from system import flush_dns_cache
+from timer import SessionTimer
+
+# What each argument of a command may be; anything else is rejected before the
+# handler runs.
+ARGUMENT_TYPES = {
+    "session": int,
+    "sites": list,
+    "profiles": list,
+    "duration": (int, float),
+    "continuous": bool,
+    "all_sites": bool,
+    "backend": str,
+    "minutes": (int, float),
+}
+BACKENDS = ["hosts", "dns"]
+
+
+def invalid_arguments(handler, request):
+    try:
+        inspect.signature(handler).bind(**request)
+    except TypeError:
+        return True
+    for name, value in request.items():
+        # bool is an int, but True is no session number.
+        if isinstance(value, bool) and ARGUMENT_TYPES[name] is not bool:
+            return True
+        if not isinstance(value, ARGUMENT_TYPES[name]):
+            return True
+        if isinstance(value, list) and not all(isinstance(v, str) for v in value):
+            return True
+    return request.get("backend", "hosts") not in BACKENDS
+
+
+class SessionDaemon:
+    def __init__(
+        self, hosts_path=HOSTS_PATH, state_path=SESSION_INFO_FILE, flush_dns=True
+    ):
+        self.hosts_path = hosts_path
+        self.state_path = state_path
+        self.flush_dns = flush_dns
+        self.session = None
+        self.timer = None
+        self.sinkhole = None
+        self.loop = None
+        self.stopping = None
+        self.commands = {
+            "start": self.start,
+            "end": self.end,
+            "status": self.status,
+            "extend": self.extend,
+            "shutdown": self.shutdown,
+        }
+
+    async def serve(self, socket_path=DAEMON_SOCKET, dns_address=None):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(sig, self.stopping.set)
+        # What 'end' sends when it finds the state file but can't reach the socket.
+        self.loop.add_signal_handler(signal.SIGUSR1, self.end_from_signal)
+
+        if dns_address:
+            from dns_sinkhole import DNSSinkhole
+
+            self.sinkhole = DNSSinkhole()
+            await self.sinkhole.start(dns_address)
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self.handle_client, path=socket_path)
+        os.chmod(socket_path, 0o600)
+        # The daemon runs as root; the socket belongs to the user who started it.
+        if sudo_uid := os.environ.get("SUDO_UID"):
+            os.chown(socket_path, int(sudo_uid), int(os.environ["SUDO_GID"]))
+        print(f"Session daemon listening on {socket_path}.", flush=True)
+
+        try:
+            async with server:
+                await self.stopping.wait()
+        finally:
+            if self.session:
+                if not self.session["finished"]:
+                    self.unblock()
+                clear_state(self.state_path)
+            if self.timer:
+                self.timer.stop()
+            if self.sinkhole:
+                self.sinkhole.close()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    handler = self.commands[request.pop("command")]
+                except (ValueError, KeyError, AttributeError):
+                    response = {"error": "Invalid command."}
+                else:
+                    if invalid_arguments(handler, request):
+                        response = {"error": "Invalid arguments."}
+                    else:
+                        response = handler(**request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def start(
+        self,
+        session,
+        sites=(),
+        profiles=(),
+        duration=0,
+        continuous=False,
+        all_sites=False,
+        backend="hosts",
+    ):
+        # A finished session still needs 'end' to write its notes, so it holds
+        # its place until then, as the state file does for a foreground start.
+        if self.session or read_state(self.state_path):
+            return {"error": "Already a current study session in progress."}
+        if backend == "dns" and not self.sinkhole:
+            return {"error": "The session daemon was not started with --backend dns."}
+
+        sites = [site for site in sites if site]
+        # The same fallback as a session started in the foreground.
+        if not all_sites and not sites and not profiles:
+            if os.path.exists(DEFAULT_SITES_FILE):
+                profiles = [DEFAULT_PROFILE]
+        # Names come off the socket and the daemon runs as root, so only ever
+        # load (and cache) the profiles that exist.
+        available_profiles = list_profiles()
+        for profile in profiles:
+            if profile not in available_profiles:
+                return {"error": f"Unknown profile: {profile}."}
+        domains = []
+        if not all_sites and (sites or profiles):
+            domain_lists = [load_profile(profile) for profile in profiles]
+            if sites:
+                domain_lists.append(compile_domains(sites))
+            domains = sorted(set().union(*domain_lists))
+
+        start_time = time.time()
+        end_time = None if continuous else start_time + duration * 60
+        new_session = {
+            "session": session,
+            "start_time": start_time,
+            "end_time": end_time,
+            "mode": "continuous" if continuous else "timed",
+            "backend": backend,
+            "all_sites": all_sites,
+            "blocked": sites + [f"{profile} profile" for profile in profiles],
+            "domains": domains,
+            "finished": False,
+        }
+        try:
+            self.block(new_session)
+        except OSError as e:
+            return {"error": f"Could not block sites: {e}."}
+        # Only now, so a failed start leaves no session behind.
+        self.session = new_session
+        self.save_state()
+
+        self.timer = SessionTimer(
+            end_time,
+            [
+                (before, self.print_time_left)
+                for before in SESSION_REMINDERS
+                if before < duration * 60
+            ],
+        )
+        threading.Thread(target=self.run_timer, args=(self.timer,), daemon=True).start()
+        print(f"Work session {session} started.", flush=True)
+        return self.describe()
+
+    def run_timer(self, timer):
+        if timer.run():
+            self.loop.call_soon_threadsafe(self.finish, timer)
+
+    def finish(self, timer):
+        # A timer from a session that was already ended can still fire late.
+        if timer is not self.timer or self.session["finished"]:
+            return
+        self.unblock()
+        self.session["finished"] = True
+        self.session["end_time"] = time.time()
+        self.save_state()
+        print(f"Work session {self.session['session']} finished.", flush=True)
+
+    def print_time_left(self, remaining):
+        print(f"{round(remaining / 60)} minutes left.", flush=True)
+
+    def end(self):
+        if not self.session:
+            return {"error": "There is no active session to end."}
+        self.timer.stop()
+        if not self.session["finished"]:
+            self.unblock()
+            self.session["end_time"] = time.time()
+        response = self.describe()
+        clear_state(self.state_path)
+        print(f"Work session {self.session['session']} ended.", flush=True)
+        self.session = self.timer = None
+        return response
+
+    def end_from_signal(self):
+        if self.session:
+            self.end()
+
+    def status(self):
+        if not self.session:
+            return {"active": False}
+        return self.describe()
+
+    def extend(self, minutes):
+        if not self.session or self.session["finished"]:
+            return {"error": "There is no active session to extend."}
+        if self.session["end_time"] is None:
+            return {"error": "Continuous sessions run until you end them."}
+        self.session["end_time"] += minutes * 60
+        self.timer.extend(minutes * 60)
+        self.save_state()
+        return self.describe()
+
+    def shutdown(self):
+        self.stopping.set()
+        return {"active": False}
+
+    def describe(self):
+        remaining = None
+        if self.session["end_time"] is not None and not self.session["finished"]:
+            remaining = max(0, self.session["end_time"] - time.time())
+        return {
+            "active": not self.session["finished"],
+            **{k: v for k, v in self.session.items() if k != "domains"},
+            "domains": len(self.session["domains"]),
+            "remaining": remaining,
+        }
+
+    def save_state(self):
+        # `status` reads this file directly, without a round trip to the daemon.
+        write_state({**self.session, "pid": os.getpid()}, self.state_path)
+
+    def block(self, session):
+        domains = session["domains"]
+        if not domains:
+            return
+        if session["backend"] == "dns":
+            self.sinkhole.block(domains)
+        else:
+            update_blocked_domains(domains, self.hosts_path)
+            self.reset_dns()
+
+    def unblock(self):
+        domains = self.session["domains"]
+        if not domains:
+            return
+        if self.session["backend"] == "dns":
+            self.sinkhole.unblock(domains)
+        else:
+            update_blocked_domains([], self.hosts_path)
+            self.reset_dns()
+
+    def reset_dns(self):
+        if self.flush_dns:
+            flush_dns_cache()
+
+
+def run_daemon(
+    socket_path=DAEMON_SOCKET,
+    hosts_path=HOSTS_PATH,
+    state_path=SESSION_INFO_FILE,
+    dns=False,
+    flush_dns=True,
+):
+    daemon = SessionDaemon(hosts_path, state_path, flush_dns)
+    asyncio.run(daemon.serve(socket_path, DNS_SINKHOLE_ADDRESS if dns else None))
@@ -0,0 +1,19 @@
+import json
+import socket
+
+from constants import DAEMON_SOCKET
+
+
+def send_command(command, socket_path=DAEMON_SOCKET, **fields):
+    # Returns None when no daemon is listening, so callers can run the session themselves.
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(json.dumps({"command": command, **fields}).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    if not line:
+        return {"error": "The session daemon closed the connection."}
+    return json.loads(line)
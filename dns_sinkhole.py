@@ -0,0 +1,221 @@
+import asyncio
+import struct
+import threading
+
+from constants import DNS_SINKHOLE_ADDRESS, DNS_UPSTREAM_ADDRESS
+
+HEADER = struct.Struct("!HHHHHH")
+QTYPE_A = 1
+QTYPE_AAAA = 28
+CLASS_IN = 1
+BLOCKED_TTL = 60
+FORWARD_TIMEOUT = 5
+# QR (response) + RA (recursion available); RD and the opcode are copied from the query.
+RESPONSE_FLAGS = 0x8080
+QUERY_FLAGS_KEPT = 0x7900
+SINKHOLE_ANSWERS = {QTYPE_A: bytes(4), QTYPE_AAAA: bytes(16)}
+
+
+class DomainTrie:
+    # Labels are stored right to left, so "example.com" also covers "a.b.example.com".
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, domain):
+        node = self.root
+        for label in reversed(domain.lower().rstrip(".").split(".")):
+            node = node.setdefault(label, {})
+        if None not in node:
+            node[None] = True
+            self.size += 1
+
+    def remove(self, domain):
+        path = [self.root]
+        for label in reversed(domain.lower().rstrip(".").split(".")):
+            if label not in path[-1]:
+                return
+            path.append(path[-1][label])
+        if path[-1].pop(None, None) is None:
+            return
+        self.size -= 1
+        labels = list(reversed(domain.lower().rstrip(".").split(".")))
+        for parent, label in zip(reversed(path[:-1]), reversed(labels)):
+            if parent[label]:
+                break
+            del parent[label]
+
+    def __contains__(self, name):
+        node = self.root
+        for label in reversed(name.lower().rstrip(".").split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+    def __len__(self):
+        return self.size
+
+
+def parse_question(packet):
+    labels = []
+    offset = HEADER.size
+    while True:
+        length = packet[offset]
+        offset += 1
+        if length == 0:
+            break
+        if length & 0xC0:
+            raise ValueError("compressed names are not valid in a question")
+        labels.append(packet[offset : offset + length].decode("ascii", "replace"))
+        offset += length
+    qtype, qclass = struct.unpack_from("!HH", packet, offset)
+    return ".".join(labels), qtype, qclass, offset + 4
+
+
+def build_blocked_response(packet, qtype, question_end):
+    query_id, flags = struct.unpack_from("!HH", packet)
+    answer = SINKHOLE_ANSWERS.get(qtype)
+    header = HEADER.pack(
+        query_id,
+        RESPONSE_FLAGS | (flags & QUERY_FLAGS_KEPT),
+        1,
+        1 if answer else 0,
+        0,
+        0,
+    )
+    response = header + packet[HEADER.size : question_end]
+    if answer:
+        # Name is a pointer back to the question at offset 12.
+        response += struct.pack(
+            "!HHHIH", 0xC00C, qtype, CLASS_IN, BLOCKED_TTL, len(answer)
+        )
+        response += answer
+    return response
+
+
+class _ServerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, sinkhole):
+        self.sinkhole = sinkhole
+
+    def connection_made(self, transport):
+        self.sinkhole.server_transport = transport
+
+    def datagram_received(self, data, addr):
+        self.sinkhole.handle_query(data, addr)
+
+
+class _UpstreamProtocol(asyncio.DatagramProtocol):
+    def __init__(self, sinkhole):
+        self.sinkhole = sinkhole
+
+    def datagram_received(self, data, addr):
+        self.sinkhole.handle_upstream_response(data)
+
+
+class DNSSinkhole:
+    def __init__(self, upstream=DNS_UPSTREAM_ADDRESS):
+        self.upstream = upstream
+        self.blocked = DomainTrie()
+        self.server_transport = None
+        self.upstream_transport = None
+        self.pending = {}
+        self.next_id = 0
+        self.loop = None
+
+    def block(self, domains):
+        for domain in domains:
+            self.blocked.add(domain)
+
+    def unblock(self, domains):
+        for domain in domains:
+            self.blocked.remove(domain)
+
+    async def start(self, address=DNS_SINKHOLE_ADDRESS):
+        self.loop = asyncio.get_running_loop()
+        await self.loop.create_datagram_endpoint(
+            lambda: _ServerProtocol(self), local_addr=address
+        )
+        self.upstream_transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: _UpstreamProtocol(self), remote_addr=self.upstream
+        )
+        return self.server_transport.get_extra_info("sockname")
+
+    def close(self):
+        for _, _, timeout in self.pending.values():
+            timeout.cancel()
+        self.pending.clear()
+        for transport in (self.server_transport, self.upstream_transport):
+            if transport:
+                transport.close()
+
+    def handle_query(self, data, addr):
+        try:
+            name, qtype, qclass, question_end = parse_question(data)
+        except (IndexError, ValueError, struct.error):
+            return
+
+        if name in self.blocked:
+            self.server_transport.sendto(
+                build_blocked_response(data, qtype, question_end), addr
+            )
+            return
+
+        # Re-key the query so answers from upstream can't collide across clients.
+        upstream_id = self._allocate_id()
+        if upstream_id is None:
+            return
+        query_id = struct.unpack_from("!H", data)[0]
+        timeout = self.loop.call_later(
+            FORWARD_TIMEOUT, self.pending.pop, upstream_id, None
+        )
+        self.pending[upstream_id] = (query_id, addr, timeout)
+        self.upstream_transport.sendto(struct.pack("!H", upstream_id) + data[2:])
+
+    def handle_upstream_response(self, data):
+        if len(data) < HEADER.size:
+            return
+        entry = self.pending.pop(struct.unpack_from("!H", data)[0], None)
+        if entry is None:
+            return
+        query_id, addr, timeout = entry
+        timeout.cancel()
+        self.server_transport.sendto(struct.pack("!H", query_id) + data[2:], addr)
+
+    def _allocate_id(self):
+        for _ in range(0x10000):
+            self.next_id = (self.next_id + 1) & 0xFFFF
+            if self.next_id not in self.pending:
+                return self.next_id
+        return None
+
+
+def start_sinkhole_thread(domains, address=DNS_SINKHOLE_ADDRESS):
+    sinkhole = DNSSinkhole()
+    sinkhole.block(domains)
+    started = threading.Event()
+    errors = []
+
+    def run():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(sinkhole.start(address))
+        except OSError as e:
+            errors.append(e)
+            started.set()
+            return
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    if errors:
+        raise errors[0]
+    return sinkhole
+
+
+def stop_sinkhole_thread(sinkhole):
+    sinkhole.loop.call_soon_threadsafe(sinkhole.close)
+    sinkhole.loop.call_soon_threadsafe(sinkhole.loop.stop)
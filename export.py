@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+from constants import POST_SESSION_RECAP_QS
+from store import (
+    get_last_session_number,
+    get_state,
+    iter_sessions,
+    refresh_sessions,
+)
+from tracing import span
+
+REFRESH_BATCH = 1000
+# One column per recap question, its lines joined by newlines. Answers to
+# questions the tracker no longer asks are only in the JSONL export.
+CSV_FIELDS = [
+    "session",
+    "start",
+    "end",
+    "duration",
+    "divider",
+    "path",
+    *POST_SESSION_RECAP_QS,
+]
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).astimezone().isoformat(timespec="seconds")
+
+
+def session_records(first_session, last_session):
+    for session, lines in iter_sessions(first_session, last_session):
+        answers = {}
+        for question, text in lines:
+            answers.setdefault(question, []).append(text)
+        yield {
+            "session": session["number"],
+            "start": format_time(session["start_time"]),
+            "end": format_time(session["end_time"]),
+            "duration": session["duration"],
+            "divider": session["divider"],
+            "path": session["path"],
+            "answers": answers,
+        }
+
+
+def write_jsonl(records, out):
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def write_csv(records, out):
+    writer = csv.DictWriter(out, CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for record in records:
+        answers = record.pop("answers")
+        record.update((q, "\n".join(lines)) for q, lines in answers.items())
+        writer.writerow(record)
+        count += 1
+    return count
+
+
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv}
+
+
+def export_sessions(fmt="jsonl", output=None, since_last=False):
+    # With since_last, only sessions stored since the last such export; numbers
+    # are handed out in commit order, so none can turn up behind the cursor.
+    state = get_state()
+    first_session = state.get("export_cursor", 0) + 1 if since_last else 1
+    last_session = get_last_session_number()
+    # A batch at a time, since refreshing holds every row it checks in memory.
+    with span("refresh store"):
+        for first in range(first_session, last_session + 1, REFRESH_BATCH):
+            refresh_sessions(first, min(first + REFRESH_BATCH - 1, last_session))
+
+    out = open(output, "w", newline="") if output else sys.stdout
+    try:
+        with span("export sessions"):
+            count = WRITERS[fmt](session_records(first_session, last_session), out)
+            out.flush()
+    except BrokenPipeError:
+        # The reader went away (eg `| head`); the cursor stays where it was.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if output:
+            out.close()
+
+    if since_last and last_session >= first_session:
+        with state.transaction():
+            state.set("export_cursor", last_session)
+    destination = f" to {output}" if output else ""
+    print(
+        f"Exported {count} session{"s" if count != 1 else ""}{destination}.",
+        file=sys.stderr,
+    )
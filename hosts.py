@@ -0,0 +1,124 @@
+import mmap
+import os
+import stat
+import tempfile
+
+from constants import FOOTER_BLOCK, HEADER_BLOCK, HOSTS_PATH
+
+HEADER = HEADER_BLOCK.encode()
+FOOTER = FOOTER_BLOCK.encode()
+BLOCK_ADDRESS = "0.0.0.0"
+
+
+def _find_line(mm, line, start):
+    pos = mm.find(line, start)
+    # Only whole lines count, not the same text in the middle of one.
+    while pos > 0 and mm[pos - 1 : pos] != b"\n":
+        pos = mm.find(line, pos + 1)
+    return pos
+
+
+def find_blocks(mm):
+    blocks = []
+    pos = 0
+    while (start := _find_line(mm, HEADER, pos)) != -1:
+        footer = _find_line(mm, FOOTER, start + len(HEADER))
+        # A block without a footer was cut short; it runs to the end of the file.
+        end = len(mm) if footer == -1 else footer + len(FOOTER)
+        blocks.append((start, end))
+        pos = end
+    return blocks
+
+
+def render_block(domains):
+    if not domains:
+        return b""
+    prefix = f"{BLOCK_ADDRESS} "
+    entries = prefix + f"\n{prefix}".join(domains) + "\n"
+    return HEADER + entries.encode() + FOOTER
+
+
+def parse_block(block):
+    body = block[len(HEADER) :]
+    if body.endswith(FOOTER):
+        body = body[: -len(FOOTER)]
+    return [name for name in body.decode().split() if name != BLOCK_ADDRESS]
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _copy_range(src_fd, dst_fd, mm, start, end):
+    # Let the kernel move the untouched parts of the file where it can.
+    if hasattr(os, "copy_file_range"):
+        try:
+            while start < end:
+                copied = os.copy_file_range(src_fd, dst_fd, end - start, start)
+                if not copied:
+                    break
+                start += copied
+        except OSError:
+            pass
+    _write_all(dst_fd, mm[start:end])
+
+
+def _open_map(f):
+    if os.fstat(f.fileno()).st_size == 0:
+        return b""
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_blocked_domains(path=HOSTS_PATH):
+    with open(path, "rb") as f:
+        mm = _open_map(f)
+        return [d for start, end in find_blocks(mm) for d in parse_block(mm[start:end])]
+
+
+def update_blocked_domains(domains, path=HOSTS_PATH):
+    new_block = render_block(domains)
+
+    with open(path, "rb") as f:
+        mm = _open_map(f)
+        size = len(mm)
+        blocks = find_blocks(mm)
+        if [mm[start:end] for start, end in blocks] == (
+            [new_block] if new_block else []
+        ):
+            return list(domains)
+        previous = [d for start, end in blocks for d in parse_block(mm[start:end])]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".hosts.")
+        try:
+            with open(fd, "wb", buffering=0) as out:
+                src_fd = f.fileno()
+                if blocks:
+                    # The new block takes the place of the first old one, the rest are dropped.
+                    _copy_range(src_fd, fd, mm, 0, blocks[0][0])
+                    _write_all(fd, new_block)
+                    ends = [end for _, end in blocks]
+                    starts = [start for start, _ in blocks[1:]] + [size]
+                    for gap_start, gap_end in zip(ends, starts):
+                        _copy_range(src_fd, fd, mm, gap_start, gap_end)
+                else:
+                    _copy_range(src_fd, fd, mm, 0, size)
+                    if size and mm[size - 1 : size] != b"\n":
+                        _write_all(fd, b"\n")
+                    _write_all(fd, new_block)
+                os.fsync(fd)
+
+                st = os.fstat(src_fd)
+                os.fchmod(fd, stat.S_IMODE(st.st_mode))
+                try:
+                    os.fchown(fd, st.st_uid, st.st_gid)
+                except PermissionError:
+                    pass
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    return previous
@@ -1,36 +1,73 @@
 import argparse
-import json
 import os
 import re
 import signal
-import subprocess
 import sys
-import time
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from itertools import accumulate, groupby
 
 from constants import (
-    COLLECTED_SESSIONS_DIR,
+    ARCHIVES_DIR,
     DEFAULT_SITES_FILE,
-    FOOTER_BLOCK,
-    HEADER_BLOCK,
-    HOSTS_PATH,
+    DNS_SINKHOLE_ADDRESS,
+    EXPORT_FORMATS,
     NO_SITES_STR,
     NOTES_DIR,
     POSSIBLE_DIVIDERS,
     POST_SESSION_RECAP_QS,
     SESSION_INFO_FILE,
-    SESSION_TRACKER_FILE,
-    SITE_PATTERN,
-    TIME_FORMAT,
+    SESSION_REMINDERS,
+    STATS_PERIODS,
 )
-from x_api.tweet_session import main as tweet_main
+from daemon_client import send_command
+from blocklists import DEFAULT_PROFILE, compile_domains, list_profiles, load_profile
+from hosts import update_blocked_domains
+from notes import (
+    collected_note_path,
+    format_timedelta,
+    render_session_note,
+    session_note_path,
+)
+from store import (
+    add_day,
+    add_session,
+    get_answers,
+    get_day_ranges,
+    get_session_number,
+    get_state,
+    get_sessions,
+    iter_session_starts,
+    archive_notes,
+    migrate_legacy,
+    reindex,
+    shard_notes,
+    read_default_divider,
+    refresh_sessions,
+    sessions_started_between,
+    set_default_divider,
+)
+from system import copy_to_clipboard, flush_dns_cache
+from session_state import (
+    clear_state,
+    is_running,
+    print_status,
+    read_state,
+    write_state,
+)
+from timer import SessionTimer
+import tracing
+from tracing import span
 
 end_session_requested = False
 is_handling_signal = False
+sinkhole = None
+blocked_sites = []
+blocked_domains = []
 
 
 def reset_dns(success_str):
-    subprocess.run(["sudo", "killall", "-HUP", "mDNSResponder"])
+    flush_dns_cache()
     return success_str
 
 
@@ -44,42 +81,10 @@ def remove_spaces(arr):
     return list(filter(bool, arr))
 
 
-def get_site_name(line):
-    return remove_spaces(line.split("\n"))[0].split(" ")[1]
-
-
 def already_a_session():
     return os.path.exists(SESSION_INFO_FILE)
 
 
-def read_default_sites():
-    if os.path.exists(DEFAULT_SITES_FILE):
-        with open(DEFAULT_SITES_FILE, "r") as f:
-            return [site.strip() for site in f.readlines() if site.strip()]
-    return [""]
-
-
-def read_default_divider():
-    if os.path.exists(SESSION_TRACKER_FILE):
-        with open(SESSION_TRACKER_FILE, "r") as f:
-            data = json.load(f)
-            return data.get("default_divider")
-    return None
-
-
-def set_default_divider(divider):
-    if os.path.exists(SESSION_TRACKER_FILE):
-        with open(SESSION_TRACKER_FILE, "r") as f:
-            data = json.load(f)
-    else:
-        data = {"session_number": 1}
-
-    data["default_divider"] = divider
-
-    with open(SESSION_TRACKER_FILE, "w") as f:
-        json.dump(data, f)
-
-
 def prompt_for_divider():
     while True:
         divider = input(
@@ -92,50 +97,39 @@ def prompt_for_divider():
         print(f"Invalid divider. Please choose from {POSSIBLE_DIVIDERS}")
 
 
-def get_session_number():
-    if os.path.exists(SESSION_TRACKER_FILE):
-        with open(SESSION_TRACKER_FILE, "r") as f:
-            data = json.load(f)
-            return data.get("session_number", 1)
-    return 1
-
-
-def increment_session_number():
-    if os.path.exists(SESSION_TRACKER_FILE):
-        with open(SESSION_TRACKER_FILE, "r") as f:
-            data = json.load(f)
-    else:
-        data = {"session_number": 1}
-
-    data["session_number"] = data.get("session_number", 1) + 1
-
-    with open(SESSION_TRACKER_FILE, "w") as f:
-        json.dump(data, f)
-
-
-def block_sites(sites, all_sites=False):
+def block_sites(sites, all_sites=False, profiles=(), backend="hosts"):
+    global sinkhole, blocked_sites, blocked_domains
     if not already_a_session():
         if all_sites:
             return "Allowing all sites."
 
-        if sites[0] == "":
-            sites = read_default_sites()
-
-        if sites[0] != "":
-            entries = []
-            with open(HOSTS_PATH, "a") as hosts_file:
-                for site in sites:
-                    entries.extend(
-                        [
-                            f"0.0.0.0 {site}.com",
-                            f"0.0.0.0 www.{site}.com",
-                        ]
-                    )
-                hosts_file.write(HEADER_BLOCK)
-                hosts_file.write("\n".join(entries))
-                hosts_file.write("\n")
-                hosts_file.write(FOOTER_BLOCK)
-            return reset_dns(f"Blocked the following sites: {", ".join(sites)}.")
+        sites = remove_spaces(sites)
+        if not sites and not profiles and os.path.exists(DEFAULT_SITES_FILE):
+            profiles = [DEFAULT_PROFILE]
+
+        if sites or profiles:
+            with span("load blocklists"):
+                domain_lists = [load_profile(profile) for profile in profiles]
+                if sites:
+                    domain_lists.append(compile_domains(sites))
+                if len(domain_lists) == 1:
+                    domains = domain_lists[0]
+                else:
+                    domains = sorted(set().union(*domain_lists))
+            blocked = sites + [f"{profile} profile" for profile in profiles]
+            blocked_sites, blocked_domains = blocked, list(domains)
+
+            if backend == "dns":
+                # asyncio is only worth importing when the sinkhole is used.
+                from dns_sinkhole import start_sinkhole_thread
+
+                sinkhole = start_sinkhole_thread(domains)
+                host, port = DNS_SINKHOLE_ADDRESS
+                return f"Blocked the following sites: {", ".join(blocked)} (DNS sinkhole on {host}:{port})."
+
+            with span("update hosts file"):
+                update_blocked_domains(domains)
+            return reset_dns(f"Blocked the following sites: {", ".join(blocked)}.")
         return NO_SITES_STR
     else:
         print("Error: Already a current study session in progress.")
@@ -143,28 +137,17 @@ def block_sites(sites, all_sites=False):
 
 
 def remove_sites():
-    blocked_sites = set()
-
-    with open(HOSTS_PATH, "r") as hosts_file:
-        lines = hosts_file.readlines()
-
-    with open(HOSTS_PATH, "w") as hosts_file:
-        seen_header_block = False
-        for line in lines:
-            if line == HEADER_BLOCK:
-                seen_header_block = True
-            elif not seen_header_block:
-                hosts_file.write(line)
-            elif line == FOOTER_BLOCK:
-                break
-            else:
-                parsed_line = get_site_name(line)
-                if m := re.match(SITE_PATTERN, parsed_line):
-                    if m not in blocked_sites:
-                        site_name = m.group(1)
-                        blocked_sites.add(site_name)
+    global sinkhole
+    if sinkhole:
+        from dns_sinkhole import stop_sinkhole_thread
+
+        stop_sinkhole_thread(sinkhole)
+        sinkhole = None
 
-    reset_dns(f"\nRemoved blocked sites: {", ".join(blocked_sites)}.")
+    with span("update hosts file"):
+        removed_domains = update_blocked_domains([])
+    if removed_domains:
+        reset_dns(f"\nRemoved {len(removed_domains)} blocked domains.")
 
 
 def get_multi_line_input(prompt, divider):
@@ -183,12 +166,7 @@ def get_multi_line_input(prompt, divider):
 # the script...
 
 
-def prompt_user(start_time, cli_divider=None):
-    if not os.path.exists(NOTES_DIR):
-        os.makedirs(NOTES_DIR)
-
-    session_number = get_session_number()
-
+def prompt_user(start_time, cli_divider=None, session_end_time=None):
     session_end_str = "Work session ended, answer these questions to recap how it went!"
     print_underline(f"{session_end_str}", with_str=False)
     print_underline(session_end_str)
@@ -201,58 +179,83 @@ def prompt_user(start_time, cli_divider=None):
     elif default_divider:
         divider = default_divider
         print(f"Using default divider: '{divider}'.")
-        print(
-            "You can change this with the '--divider' argument or by editing the 'session_tracker.json' file."
-        )
+        print("You can change this with the '--divider' argument.")
     else:
         divider = prompt_for_divider()
         set_default_divider(divider)
         print(f"Default divider set to: '{divider}'.")
-        print(
-            "You can change this in the future with the '--divider' argument or by editing the 'session_tracker.json' file."
-        )
+        print("You can change this in the future with the '--divider' argument.")
 
     answers = {}
 
     print()
-    for q in POST_SESSION_RECAP_QS:
-        answer = get_multi_line_input(f"{q}", divider)
-        answers[q] = answer
-        print()
-
-    note_file_path = os.path.join(NOTES_DIR, f"session_{session_number:02}.md")
-    with open(note_file_path, "w") as note_file:
-        session_start_time = start_time
-        session_end_time = datetime.now()
-        session_duration_str = format_timedelta(session_end_time - session_start_time)
-        note_file.write(f"**Session {session_number} - {session_duration_str}**\n\n")
-
-        for q, a in answers.items():
-            note_file.write(f"**{q}**\n{a}\n\n")
-
-    increment_session_number()
+    with span("answer recap questions"):
+        for q in POST_SESSION_RECAP_QS:
+            answer = get_multi_line_input(f"{q}", divider)
+            answers[q] = answer
+            print()
+
+    session_end_time = session_end_time or datetime.now()
+    session_duration_str = format_timedelta(session_end_time - start_time)
+    # The number is handed out only once the answers are in, so another session
+    # ended meanwhile (eg from a hook) can't take the same one.
+    with span("store session"), get_state().transaction() as state:
+        session_number = state.next_session_number()
+        note_file_path = session_note_path(session_number, start_time)
+        os.makedirs(os.path.dirname(note_file_path), exist_ok=True)
+        with span("write session note"), open(note_file_path, "w") as note_file:
+            note_file.write(
+                render_session_note(
+                    session_number,
+                    start_time,
+                    session_end_time,
+                    divider,
+                    session_duration_str,
+                    answers,
+                )
+            )
+        add_session(
+            session_number,
+            start_time.timestamp(),
+            session_end_time.timestamp(),
+            divider,
+            {q: remove_spaces(a.split("\n")) for q, a in answers.items()},
+            note_file_path,
+        )
 
-    subprocess.run(f"echo '{note_file_path}' | pbcopy", shell=True)
+    copy_to_clipboard(note_file_path)
     print(f"⭐️ Congrats on working for {session_duration_str} ⭐️")
     print(
         f"\nYour answers have been saved to {note_file_path}.\nThe file path has also been copied to your clipboard!"
     )
 
 
-def start_session(sites, duration, continuous, all_sites):
-    if block_str := block_sites(sites, all_sites):
+def print_time_left(remaining):
+    print(f"⏳ {format_timedelta(timedelta(seconds=round(remaining)))} left.")
+
+
+def start_session(sites, duration, continuous, all_sites, profiles=(), backend="hosts"):
+    if block_str := block_sites(sites, all_sites, profiles, backend):
         start_time = datetime.now()
-        end_time = start_time + timedelta(minutes=duration)
+        end_time = None if continuous else start_time + timedelta(minutes=duration)
 
         session_number = get_session_number()
 
-        with open(SESSION_INFO_FILE, "w") as session_file:
-            session_str = f"Session number {session_number}\nStart time:{start_time.strftime(TIME_FORMAT)}\n"
-            if end_time:
-                session_str += "End time:{end_time.strftime(TIME_FORMAT)}\n"
-            session_file.write(session_str)
-            if block_str != NO_SITES_STR:
-                session_file.write("\n".join(sites))
+        with span("write session state"):
+            write_state(
+                {
+                    "session": session_number,
+                    "start_time": start_time.timestamp(),
+                    "end_time": end_time and end_time.timestamp(),
+                    "mode": "continuous" if continuous else "timed",
+                    "backend": backend,
+                    "all_sites": all_sites,
+                    "blocked": blocked_sites,
+                    "domains": blocked_domains,
+                    "finished": False,
+                    "pid": os.getpid(),
+                }
+            )
 
         session_started_str = f"Work session {session_number} started "
         if continuous:
@@ -260,7 +263,7 @@ def start_session(sites, duration, continuous, all_sites):
                 "in continuous mode. It will run until you stop the script."
             )
         else:
-            session_started_str += f"for {duration} minutes."
+            session_started_str += f"for {duration} minutes (until {end_time:%H:%M})."
 
         underline_str = (
             session_started_str
@@ -273,12 +276,19 @@ def start_session(sites, duration, continuous, all_sites):
         print(block_str)
         print_underline(underline_str, with_str=False)
 
+        if continuous:
+            timer = SessionTimer()
+        else:
+            timer = SessionTimer(
+                end_time.timestamp(),
+                [
+                    (before, print_time_left)
+                    for before in SESSION_REMINDERS
+                    if before < duration * 60
+                ],
+            )
         try:
-            if continuous:
-                while True:
-                    time.sleep(1)
-            else:
-                time.sleep(duration * 60)
+            timer.run()
         except KeyboardInterrupt:
             pass
         finally:
@@ -286,30 +296,98 @@ def start_session(sites, duration, continuous, all_sites):
                 end_session()
 
 
-def remove_old_info_file_and_get_start_time():
-    start_time = None
-    if os.path.exists(SESSION_INFO_FILE):
-        with open(SESSION_INFO_FILE, "r") as f:
-            for line in f:
-                if line.startswith("Start time:"):
-                    start_time_str = line.split("Start time:")[1].strip()
-                    start_time = datetime.strptime(start_time_str, TIME_FORMAT)
-                    break
-        os.remove(SESSION_INFO_FILE)
-    return start_time
+def describe_blocked(session):
+    if session["all_sites"]:
+        return "Allowing all sites."
+    if session["blocked"]:
+        return f"Blocked the following sites: {", ".join(session["blocked"])}."
+    return NO_SITES_STR
+
+
+def start_daemon_session(sites, duration, continuous, all_sites, profiles, backend):
+    session = send_command(
+        "start",
+        session=get_session_number(),
+        sites=sites,
+        profiles=profiles,
+        duration=duration,
+        continuous=continuous,
+        all_sites=all_sites,
+        backend=backend,
+    )
+    if session is None:
+        return False
+    if "error" in session:
+        print(f"Error: {session['error']}")
+        sys.exit(1)
+
+    session_started_str = f"Work session {session['session']} started "
+    if continuous:
+        session_started_str += "in continuous mode. It will run until you end it."
+    else:
+        end_time = datetime.fromtimestamp(session["end_time"])
+        session_started_str += f"for {duration} minutes (until {end_time:%H:%M})."
+    print(session_started_str)
+    print(describe_blocked(session))
+    print("The session daemon is running it; use 'end', 'status' or 'extend'.")
+    return True
+
+
+def end_daemon_session(cli_divider=None):
+    with span("ask daemon to end session"):
+        session = send_command("end")
+    if session is None:
+        return False
+    if "error" in session:
+        print(f"Error: {session['error']}")
+        sys.exit(1)
+
+    print(f"\nWork session {session['session']} ended. Site blocking has been removed.")
+    try:
+        prompt_user(
+            datetime.fromtimestamp(session["start_time"]),
+            cli_divider,
+            datetime.fromtimestamp(session["end_time"]),
+        )
+    except KeyboardInterrupt:
+        print("\nSkipping session recap due to interruption.")
+    return True
+
+
+def extend_daemon_session(minutes):
+    session = send_command("extend", minutes=minutes)
+    if session is None:
+        print("No session daemon is running.")
+        sys.exit(1)
+    if "error" in session:
+        print(f"Error: {session['error']}")
+        sys.exit(1)
+    end_time = datetime.fromtimestamp(session["end_time"])
+    print(
+        f"Work session {session['session']} extended by {minutes} minutes (until {end_time:%H:%M})."
+    )
 
 
 def end_session(cli_divider=None):
+    # Run from another terminal or a hook, 'end' can't reach the blocking the
+    # 'start' process holds (eg its DNS sinkhole), so it asks that process to stop.
+    # That process may clear the state file as it goes, so it is only read once.
+    exists = os.path.exists(SESSION_INFO_FILE)
+    with span("read session state"):
+        state = read_state()
+    if state and state.get("pid", os.getpid()) != os.getpid() and is_running(state):
+        try:
+            os.kill(state["pid"], signal.SIGUSR1)
+        except PermissionError:
+            print(
+                f"Error: The session's process ({state['pid']}) belongs to another user. Run 'end' with sudo to stop its site blocking."
+            )
     remove_sites()
+    clear_state()
 
-    start_time = None
-    if exists := os.path.exists(SESSION_INFO_FILE):
-        # save the old start time to get full duration
-        start_time = remove_old_info_file_and_get_start_time()
-
-    if start_time:
+    if state:
         try:
-            prompt_user(start_time, cli_divider)
+            prompt_user(datetime.fromtimestamp(state["start_time"]), cli_divider)
         except KeyboardInterrupt:
             print("\nSkipping session recap due to interruption.")
     else:
@@ -348,11 +426,21 @@ def confirm_end_session():
 def cleanup_and_exit():
     remove_sites()
     print("Session ended abruptly. Site blocking has been removed.")
-    if os.path.exists(SESSION_INFO_FILE):
-        os.remove(SESSION_INFO_FILE)
+    clear_state()
     sys.exit(1)
 
 
+def ended_elsewhere(sig, frame):
+    # Another 'end' already cleared the session and is asking for the recap.
+    global end_session_requested
+    end_session_requested = True
+    remove_sites()
+    print(
+        "\nThe session was ended from another terminal. Site blocking has been removed."
+    )
+    sys.exit(0)
+
+
 def signal_handler(sig, frame):
     global end_session_requested, is_handling_signal
     if is_handling_signal:
@@ -366,36 +454,9 @@ def signal_handler(sig, frame):
         is_handling_signal = False
 
 
-def format_timedelta(td):
-    hours, remainder = divmod(td.total_seconds(), 3600)
-    minutes, _ = divmod(remainder, 60)
-    if int(hours) > 0:
-        return f"{int(hours)} hours, {int(minutes)} minutes"
-    else:
-        return f"{int(minutes)} minutes"
-
-
 def sum_durations(durations):
-    total_minutes = 0
-    for duration in durations:
-        if "hours" in duration and "minutes" in duration:
-            hours, minutes = map(int, re.findall(r"\d+", duration))
-            total_minutes += (hours * 60) + minutes
-        elif "minutes" in duration:
-            minutes = int(re.findall(r"\d+", duration)[0])
-            total_minutes += minutes
-    hours, minutes = divmod(total_minutes, 60)
-    if hours > 0:
-        return f"{hours} hours, {minutes} minutes"
-    else:
-        return f"{minutes} minutes"
-
-
-def detect_divider(text):
-    for divider in POSSIBLE_DIVIDERS:
-        if any(line.strip().startswith(divider) for line in text.split("\n")):
-            return divider
-    return None
+    # Durations are stored as whole seconds.
+    return format_timedelta(timedelta(seconds=sum(durations)))
 
 
 def has_divider(text):
@@ -410,34 +471,20 @@ def replace_or_add_divider(text, new_divider):
     return f"{new_divider} {text.strip()}"
 
 
-def get_and_increment_day_number():
-    if os.path.exists(SESSION_TRACKER_FILE):
-        with open(SESSION_TRACKER_FILE, "r") as f:
-            data = json.load(f)
-    else:
-        data = {"session_number": 1, "day_number": 0}
-
-    data["day_number"] = data.get("day_number", 0) + 1
-
-    with open(SESSION_TRACKER_FILE, "w") as f:
-        json.dump(data, f)
-
-    return data["day_number"]
-
-
-def collect_notes(start_session, end_session, cli_divider=None):
-    if not os.path.exists(NOTES_DIR):
-        print(
-            f"Error: No session notes found in {NOTES_DIR}. Please run a session first."
-        )
-        sys.exit(1)
-
-    session_files = [
-        f
-        for f in os.listdir(NOTES_DIR)
-        if f.startswith("session_") and f.endswith(".md")
-    ]
-    if not session_files:
+def collect_notes(
+    start_session,
+    end_session,
+    cli_divider=None,
+    jobs=1,
+    processes=False,
+    copy_path=True,
+):
+    # Only notes edited or deleted since they were last read get re-parsed.
+    with span("refresh store"):
+        refresh_sessions(start_session, end_session, jobs, processes)
+    with span("query sessions"):
+        sessions = get_sessions(start_session, end_session)
+    if not sessions:
         print(
             f"Error: No session notes found in {NOTES_DIR}. Please run a session first."
         )
@@ -453,81 +500,155 @@ def collect_notes(start_session, end_session, cli_divider=None):
         final_divider = prompt_for_divider()
         set_default_divider(final_divider)
 
-    used_dividers = set()
-    combined_content = [(q, []) for q in POST_SESSION_RECAP_QS]
-    session_durations = []
-
-    if not os.path.exists(COLLECTED_SESSIONS_DIR):
-        os.makedirs(COLLECTED_SESSIONS_DIR)
-
+    found_sessions = {session["number"] for session in sessions}
     for note_num in range(start_session, end_session + 1):
-        filename = f"session_{note_num:02}.md"
-        filepath = os.path.join("session_notes", filename)
-
-        if not os.path.exists(filepath):
+        if note_num not in found_sessions:
             print(
                 f"Warning: Session {note_num} not found in the {NOTES_DIR} directory. Skipping."
             )
-            continue
 
-        with open(filepath, "r") as f:
-            content = f.read()
-        duration_match = re.search(r"\*\*Session \d+ - (.+)\*\*", content)
-        if duration_match:
-            session_durations.append(duration_match.group(1))
-        for i, (question, answers) in enumerate(combined_content):
-            pattern = f"\\*\\*{re.escape(question)}\\*\\*\n(.*?)(?=\\*\\*|$)"
-            matches = re.findall(pattern, content, re.DOTALL)
-            if matches:
-                if divider := detect_divider(matches[0]):
-                    used_dividers.add(divider)
-                if match_arr := matches[0].strip().split("\n"):
-                    filtered_matches = [m.strip() for m in match_arr if m.strip()]
-                    if filtered_matches:
-                        combined_content[i] = (question, answers + filtered_matches)
-
-    day_number = get_and_increment_day_number()
-    combined_filename = (
-        f"day_{day_number:02}_sessions_{start_session:02d}_to_{end_session:02d}.md"
-    )
-    combined_filepath = os.path.join(COLLECTED_SESSIONS_DIR, combined_filename)
-
-    with open(combined_filepath, "w") as combined_file:
-        combined_file.write(f"**Day {day_number}**\n\n")
-        combined_file.write(f"Total duration: {sum_durations(session_durations)}\n\n")
-        for question, answers in combined_content:
-            combined_file.write(f"**{question}**\n")
-            for answer in answers:
-                formatted_answer = replace_or_add_divider(answer, final_divider)
-                combined_file.write(f"{formatted_answer}\n")
-            combined_file.write("\n")
+    combined_content = {q: [] for q in POST_SESSION_RECAP_QS}
+    with span("query answers"):
+        for row in get_answers(start_session, end_session):
+            if row["question"] in combined_content:
+                combined_content[row["question"]].append(row["text"])
+    session_durations = [session["duration"] for session in sessions]
+
+    total_duration = sum_durations(session_durations)
+    with span("write collected note"), get_state().transaction() as state:
+        day_number = state.next_day_number()
+        created = datetime.now()
+        combined_filepath = collected_note_path(
+            day_number, start_session, end_session, created
+        )
+        os.makedirs(os.path.dirname(combined_filepath), exist_ok=True)
+
+        with open(combined_filepath, "w") as combined_file:
+            combined_file.write(f"**Day {day_number}**\n\n")
+            combined_file.write(f"Total duration: {total_duration}\n\n")
+            for question, answers in combined_content.items():
+                combined_file.write(f"**{question}**\n")
+                for answer in answers:
+                    formatted_answer = replace_or_add_divider(answer, final_divider)
+                    combined_file.write(f"{formatted_answer}\n")
+                combined_file.write("\n")
+        add_day(
+            day_number,
+            start_session,
+            end_session,
+            sum(session_durations),
+            combined_filepath,
+            created.timestamp(),
+        )
 
     print(f"Combined notes saved to: {combined_filepath}")
-    subprocess.run(f"echo '{combined_filepath}' | pbcopy", shell=True)
-    print("File path copied to clipboard!")
+    if copy_path:
+        copy_to_clipboard(combined_filepath)
+        print("File path copied to clipboard!")
+
+
+def day_start(day):
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+
+def collect_dates(since, until, cli_divider=None, jobs=1, processes=False):
+    # Every session started from the start of `since` to the end of `until`.
+    first, last = sessions_started_between(
+        day_start(since) if since else 0,
+        day_start(until + timedelta(days=1)) if until else float("inf"),
+    )
+    if first is None:
+        when = (
+            f"on {since}"
+            if since == until
+            else f"between {since or 'the first session'} and {until or 'now'}"
+        )
+        print(f"Error: No sessions started {when}.")
+        sys.exit(1)
+    collect_notes(first, last, cli_divider, jobs, processes)
+
+
+def collect_all_days(cli_divider=None, jobs=1, processes=False):
+    # One pass over the sessions in start order, grouped by the day each started.
+    # A day is done if an earlier collect covered all its sessions; today isn't
+    # over yet, so it is left for later.
+    days = get_day_ranges()
+    firsts = [first for first, _ in days]
+    reach = list(accumulate((last for _, last in days), max))
+    today = date.today()
+    missing = []
+    for day, sessions in groupby(
+        iter_session_starts(), key=lambda row: date.fromtimestamp(row[1])
+    ):
+        if day >= today:
+            break
+        numbers = [number for number, _ in sessions]
+        first, last = min(numbers), max(numbers)
+        covered = bisect_right(firsts, first) - 1
+        if covered >= 0 and reach[covered] >= last:
+            continue
+        missing.append((day, first, last))
+
+    if not missing:
+        print("Every day before today already has a collected note.")
+        return
+    for day, first, last in missing:
+        print(f"{day}: ", end="")
+        collect_notes(first, last, cli_divider, jobs, processes, copy_path=False)
+    print(f"Collected {len(missing)} day{"s" if len(missing) > 1 else ""}.")
 
 
 def main():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGUSR1, ended_elsewhere)
 
     parser = argparse.ArgumentParser(
         description="Block websites during this study session of a specified time period."
     )
     parser.add_argument(
         "action",
-        choices=["start", "end", "collect", "tweet"],
-        help="Actions to perform: 'start' a new session, 'end' the current session, 'collect' to group multiple sessions into one note, or 'tweet' to post session notes to X.",
+        choices=[
+            "start",
+            "end",
+            "status",
+            "extend",
+            "daemon",
+            "collect",
+            "tweet",
+            "migrate",
+            "archive",
+            "stats",
+            "search",
+            "export",
+        ],
+        help="Actions to perform: 'start' a new session, 'end' the current session, 'status' to show the running session, 'extend' it by --duration minutes, 'daemon' to run the background session daemon, 'collect' to group multiple sessions into one note, 'tweet' to post session notes to X, 'migrate' to import notes written by older versions into the session store and move notes into month folders, 'archive' to roll notes from before --before into a compressed archive, 'stats' to summarize focus time across all sessions, 'search' to find the sessions whose notes mention the words given after it, or 'export' to write every session's metadata and answers as JSONL or CSV.",
+    )
+    parser.add_argument(
+        "query",
+        nargs="*",
+        help='Words for the search action to look for; a "quoted phrase" matches those words in order, and a word ending in * matches as a prefix.',
     )
     parser.add_argument(
         "--sites",
         help="Comma-separated list of site names (eg, x, instagram, etc.) to block.",
         default="",
     )
+    parser.add_argument(
+        "--profile",
+        help="Comma-separated list of blocklist profiles (files in the blocklists/ directory, eg, social, news) to block.",
+        default="",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["hosts", "dns"],
+        default="hosts",
+        help="How to block sites: 'hosts' edits /etc/hosts, 'dns' answers blocked names from a local DNS server for as long as the session runs (point your resolver at it).",
+    )
     parser.add_argument(
         "--duration",
         type=int,
-        help="Time to block sites (in minutes).",
+        help="Time to block sites (in minutes). With 'extend', the minutes to add to the running session.",
         default=0,
     )
     parser.add_argument(
@@ -549,12 +670,115 @@ def main():
         "--to",
         type=int,
     )
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        help="Day (eg 2024-05-01) whose sessions the collect action collects, by when each started.",
+    )
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        help="First day (eg 2024-05-01) whose sessions the collect action collects; with --until, the last.",
+    )
+    parser.add_argument(
+        "--until",
+        type=date.fromisoformat,
+    )
+    parser.add_argument(
+        "--all-days",
+        action="store_true",
+        help="If set, the collect action writes a collected note for every day before today that doesn't have one yet.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of notes the collect action reads in parallel when checking for edited notes (default 1), or threads tweet --queue posts at once (default 4).",
+    )
+    parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="If set, collect also parses edited notes in a pool of --jobs processes.",
+    )
+    parser.add_argument(
+        "--period",
+        choices=STATS_PERIODS,
+        default="day",
+        help="How the stats action groups sessions.",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=14,
+        help="Number of most recent periods the stats action lists, or sessions the search action shows.",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="If set, the stats, status and search actions print JSON.",
+    )
+    parser.add_argument(
+        "--question",
+        help="Limit the search action to answers to one recap question, by its number (eg 2) or part of its text (eg 'went well').",
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="If set, the search action first re-reads every note edited by hand since it was stored.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="If set, the tweet action finishes the last thread that stopped partway instead of starting a new one.",
+    )
+    parser.add_argument(
+        "--discard",
+        action="store_true",
+        help="If set, the tweet action forgets the last thread that stopped partway, eg because its note was edited since, so it is no longer offered for --resume.",
+    )
+    parser.add_argument(
+        "--queue",
+        help="File listing notes for the tweet action to post as separate threads, one per line, each optionally followed by a time to post it at (eg '2024-05-01 18:30').",
+    )
+    parser.add_argument(
+        "--numbered",
+        action="store_true",
+        help="If set, the tweet action ends each post of a thread with its position, eg '2/5'.",
+    )
+    parser.add_argument(
+        "--before",
+        type=date.fromisoformat,
+        help="Date (eg 2024-01-01) before which the archive action archives notes.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=EXPORT_FORMATS,
+        default="jsonl",
+        help="Format of the export action's output: one JSON object per line, or CSV with a column per recap question.",
+    )
+    parser.add_argument(
+        "--output",
+        help="File the export action writes to (default stdout).",
+    )
+    parser.add_argument(
+        "--since-last",
+        action="store_true",
+        help="If set, the export action only writes sessions stored since the last export run with --since-last.",
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="If set, print how long each phase of the action took when it exits. With a FILE ending in .json, also write the phases as Chrome trace events; with any other FILE, write a cProfile dump.",
+    )
     parser.add_argument(
         "--divider",
         choices=POSSIBLE_DIVIDERS,
         help="Set the divider for the collect action. Also sets as new default if different from current default.",
     )
     args = parser.parse_args()
+    if args.trace is not None:
+        tracing.start(args.trace)
 
     if args.action == "start":
         if not args.duration and not args.continuous:
@@ -563,26 +787,135 @@ def main():
             )
             sys.exit(1)
         sites = [""] if args.all_sites else args.sites.split(",")
+        profiles = remove_spaces(args.profile.split(","))
+        available_profiles = list_profiles()
+        for profile in profiles:
+            if profile not in available_profiles:
+                print(
+                    f"Error: Unknown profile '{profile}'. Available profiles: {", ".join(available_profiles) or "none"}."
+                )
+                sys.exit(1)
+        if start_daemon_session(
+            sites,
+            args.duration,
+            args.continuous,
+            args.all_sites,
+            profiles,
+            args.backend,
+        ):
+            return
         start_session(
             sites,
             args.duration,
             args.continuous,
             args.all_sites,
+            profiles,
+            args.backend,
         )
     elif args.action == "end":
-        end_session(args.divider)
+        if not end_daemon_session(args.divider):
+            end_session(args.divider)
+    elif args.action == "status":
+        if not print_status(args.json):
+            sys.exit(1)
+    elif args.action == "extend":
+        if args.duration <= 0:
+            print("Error: --duration is required for 'extend' action.")
+            sys.exit(1)
+        extend_daemon_session(args.duration)
+    elif args.action == "daemon":
+        # The daemon owns the event loop and its own signal handling.
+        from daemon import run_daemon
+
+        run_daemon(dns=args.backend == "dns")
     elif args.action == "collect":
-        if not args.collect_from and not args.to:
+        ranges = [
+            bool(args.collect_from or args.to),
+            bool(args.date),
+            bool(args.since or args.until),
+            args.all_days,
+        ]
+        if sum(ranges) != 1:
             print(
-                "Error: Must pass which session notes to collect into one daily note. The relevant args are: 'collect_from' and 'to')."
+                "Error: Must pass which session notes to collect into one daily note, either by number ('--collect-from' and '--to'), by day ('--date', or '--since' and '--until'), or '--all-days'."
             )
             sys.exit(1)
 
         if args.divider and args.divider != read_default_divider():
             set_default_divider(args.divider)
-        collect_notes(args.collect_from, args.to, args.divider)
+        if args.all_days:
+            collect_all_days(args.divider, args.jobs or 1, args.processes)
+        elif args.date or args.since or args.until:
+            collect_dates(
+                args.date or args.since,
+                args.date or args.until,
+                args.divider,
+                args.jobs or 1,
+                args.processes,
+            )
+        else:
+            collect_notes(
+                args.collect_from, args.to, args.divider, args.jobs or 1, args.processes
+            )
     elif args.action == "tweet":
-        tweet_main()
+        # Only the tweet action needs the HTTP/OAuth stack, so keep it off the start/end path.
+        if args.queue:
+            from x_api.publisher import main as publish_main
+
+            publish_main(args.queue, args.jobs or 4, args.numbered)
+        else:
+            from x_api.tweet_session import main as tweet_main
+
+            tweet_main(args.resume, args.numbered, args.discard)
+    elif args.action == "migrate":
+        migrate_legacy()
+        with span("move notes into month folders"):
+            moved_sessions, moved_days = shard_notes()
+        if moved_sessions or moved_days:
+            print(
+                f"Moved {moved_sessions} session notes and {moved_days} collected notes into month folders."
+            )
+    elif args.action == "archive":
+        if not args.before:
+            print("Error: --before is required for 'archive' action.")
+            sys.exit(1)
+        cutoff = datetime.combine(args.before, datetime.min.time()).timestamp()
+        archived = archive_notes(cutoff)
+        if archived:
+            print(
+                f"Archived {archived} notes from before {args.before} into {ARCHIVES_DIR}/."
+            )
+        else:
+            print(f"There are no notes from before {args.before} left to archive.")
+    elif args.action == "stats":
+        from stats import print_stats
+
+        print_stats(args.period, args.limit, args.json)
+    elif args.action == "search":
+        from search import match_expression, print_search, resolve_question
+
+        query = " ".join(args.query)
+        if not match_expression(query):
+            print(
+                "Error: Must pass words to search for, eg 'python main.py search sqlite'."
+            )
+            sys.exit(1)
+        question = None
+        if args.question:
+            question = resolve_question(args.question)
+            if question is None:
+                print(
+                    f"Error: '{args.question}' doesn't pick out one of the recap questions: {", ".join(POST_SESSION_RECAP_QS)}."
+                )
+                sys.exit(1)
+        if args.reindex:
+            with span("reindex notes"):
+                reindex(args.jobs or 1)
+        print_search(query, question, args.limit, args.json)
+    elif args.action == "export":
+        from export import export_sessions
+
+        export_sessions(args.format, args.output, args.since_last)
     else:
         print("Please enter a valid action: start, end.")
 
@@ -0,0 +1,42 @@
+import os
+import struct
+import zipfile
+import zlib
+
+# Fixed part of a zip local file header; the name and extra field follow it.
+LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+def write_archive(path, note_paths):
+    # A plain zip, so any unzip tool can still open it. Written to a temporary file
+    # and renamed, so a crash never leaves a half-written archive behind.
+    tmp_path = f"{path}.tmp"
+    members = []
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for note_path in note_paths:
+            zf.write(note_path)
+            info = zf.filelist[-1]
+            members.append(
+                (note_path, info.header_offset, info.compress_size, info.CRC)
+            )
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return members
+
+
+def read_member(path, offset, compressed_size, crc):
+    # Seeks straight to one member and inflates only it, without reading the
+    # archive's central directory.
+    with open(path, "rb") as f:
+        f.seek(offset)
+        header = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))
+        if header[0] != LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"No note at offset {offset} of {path}.")
+        name_length, extra_length = header[-2:]
+        f.seek(name_length + extra_length, os.SEEK_CUR)
+        data = zlib.decompress(f.read(compressed_size), -zlib.MAX_WBITS)
+    if zlib.crc32(data) != crc:
+        raise zipfile.BadZipFile(f"The note at offset {offset} of {path} is corrupt.")
+    return data.decode()
@@ -0,0 +1,175 @@
+import json
+import os
+import re
+from datetime import datetime
+
+from constants import (
+    COLLECTED_SESSIONS_DIR,
+    NOTES_DIR,
+    POSSIBLE_DIVIDERS,
+    POST_SESSION_RECAP_QS,
+)
+
+SESSION_HEADING_PATTERN = re.compile(r"Session (\d+) - (.+)")
+BOLD_LINE_PATTERN = re.compile(r"\*\*(.+?)\*\*$")
+DIGITS_PATTERN = re.compile(r"\d+")
+QUESTIONS = frozenset(POST_SESSION_RECAP_QS)
+FRONT_MATTER_MARKER = "---\n"
+
+
+def session_note_path(session_number, start_time):
+    # One folder per month keeps every directory small; the store maps session
+    # numbers to paths, so nothing needs to list them.
+    return os.path.join(
+        NOTES_DIR,
+        f"{start_time:%Y}",
+        f"{start_time:%m}",
+        f"session_{session_number:06}.md",
+    )
+
+
+def collected_note_path(day_number, first_session, last_session, created):
+    return os.path.join(
+        COLLECTED_SESSIONS_DIR,
+        f"{created:%Y}",
+        f"{created:%m}",
+        f"day_{day_number:04}_sessions_{first_session:06}_to_{last_session:06}.md",
+    )
+
+
+def render_front_matter(session_number, start_time, end_time, divider):
+    fields = {
+        "session": session_number,
+        "start": start_time.astimezone().isoformat(timespec="seconds"),
+        "end": end_time.astimezone().isoformat(timespec="seconds"),
+        "duration": round((end_time - start_time).total_seconds()),
+        "divider": json.dumps(divider, ensure_ascii=False),
+    }
+    lines = "".join(f"{key}: {value}\n" for key, value in fields.items())
+    return f"{FRONT_MATTER_MARKER}{lines}{FRONT_MATTER_MARKER}\n"
+
+
+def render_session_note(
+    session_number, start_time, end_time, divider, duration_str, answers
+):
+    parts = [
+        render_front_matter(session_number, start_time, end_time, divider),
+        f"**Session {session_number} - {duration_str}**\n\n",
+    ]
+    for q, a in answers.items():
+        parts.append(f"**{q}**\n{a}\n\n")
+    return "".join(parts)
+
+
+def format_timedelta(td):
+    hours, remainder = divmod(td.total_seconds(), 3600)
+    minutes, _ = divmod(remainder, 60)
+    if int(hours) > 0:
+        return f"{int(hours)} hours, {int(minutes)} minutes"
+    else:
+        return f"{int(minutes)} minutes"
+
+
+def parse_timestamp(value):
+    return datetime.fromisoformat(value).timestamp()
+
+
+def parse_divider(value):
+    divider = json.loads(value)
+    if not isinstance(divider, str):
+        raise ValueError(f"not a divider: {value}")
+    return divider
+
+
+FRONT_MATTER_FIELDS = {
+    "session": int,
+    "duration": int,
+    "start": parse_timestamp,
+    "end": parse_timestamp,
+    "divider": parse_divider,
+}
+
+
+def split_front_matter(content):
+    if not content.startswith(FRONT_MATTER_MARKER):
+        return None, content
+    end = content.find(f"\n{FRONT_MATTER_MARKER}", len(FRONT_MATTER_MARKER) - 1)
+    if end == -1:
+        return None, content
+
+    fields = {}
+    for line in content[len(FRONT_MATTER_MARKER) : end].splitlines():
+        key, _, value = line.partition(":")
+        fields[key.strip()] = value.strip()
+
+    metadata = {}
+    for key, parse in FRONT_MATTER_FIELDS.items():
+        if key in fields:
+            # A field mangled by hand (eg "duration: 1h") is left out, so the
+            # note falls back to what its heading says.
+            try:
+                metadata[key] = parse(fields[key])
+            except ValueError:
+                pass
+    return metadata, content[end + 1 + len(FRONT_MATTER_MARKER) :]
+
+
+def parse_duration(duration):
+    # Legacy notes only carry "H hours, M minutes" / "M minutes".
+    if "hours" in duration and "minutes" in duration:
+        hours, minutes = map(int, DIGITS_PATTERN.findall(duration))
+        return (hours * 60 + minutes) * 60
+    elif "minutes" in duration:
+        return int(DIGITS_PATTERN.findall(duration)[0]) * 60
+    return 0
+
+
+def parse_note(content):
+    session = None
+    duration = None
+    divider = None
+    answers = {}
+    current = None
+
+    metadata, content = split_front_matter(content)
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith("**"):
+            # Any bold line closes the answer that was being read.
+            current = None
+            if not (m := BOLD_LINE_PATTERN.match(line)):
+                continue
+            title = m.group(1)
+            if title in QUESTIONS:
+                if title not in answers:
+                    current = answers[title] = []
+            elif session is None and (heading := SESSION_HEADING_PATTERN.match(title)):
+                session = int(heading.group(1))
+                duration = parse_duration(heading.group(2))
+        elif current is not None and line:
+            current.append(line)
+            if divider is None:
+                divider = next(
+                    (d for d in POSSIBLE_DIVIDERS if line.startswith(d)), None
+                )
+
+    note = {
+        "session": session,
+        "duration": duration,
+        "divider": divider,
+        "start": None,
+        "end": None,
+        "answers": answers,
+    }
+    # Front matter carries exact values; the heading is only a fallback for old notes.
+    if metadata:
+        note.update(metadata)
+    return note
+
+
+def parse_notes(paths):
+    for path in paths:
+        with open(path, "r") as f:
+            note = parse_note(f.read())
+        note["path"] = path
+        yield note
@@ -0,0 +1,79 @@
+import json
+import re
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+from constants import POST_SESSION_RECAP_QS
+from store import search_answers
+from tracing import span
+
+# A "quoted phrase" or a bare word, which may end in * to match as a prefix.
+TERM_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def quote(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def match_expression(query):
+    # Every term is quoted, so punctuation in a query (eg c++, 2/5) is never read
+    # as FTS5 syntax; a line has to contain all of them.
+    terms = []
+    for phrase, word in TERM_PATTERN.findall(query):
+        if phrase.strip():
+            terms.append(quote(phrase))
+        elif word.strip("*"):
+            terms.append(quote(word.rstrip("*")) + ("*" if word.endswith("*") else ""))
+    return " AND ".join(terms)
+
+
+def resolve_question(question):
+    # A question's number (eg 2) or part of its text (eg "went well").
+    if question.isdigit() and 1 <= int(question) <= len(POST_SESSION_RECAP_QS):
+        return POST_SESSION_RECAP_QS[int(question) - 1]
+    matches = [q for q in POST_SESSION_RECAP_QS if question.lower() in q.lower()]
+    return matches[0] if len(matches) == 1 else None
+
+
+def search_sessions(query, question=None, limit=20):
+    results = []
+    rows = search_answers(match_expression(query), question)
+    for session, lines in groupby(rows, key=itemgetter("session")):
+        if len(results) == limit:
+            break
+        lines = list(lines)
+        results.append(
+            {
+                "session": session,
+                "start": datetime.fromtimestamp(lines[0]["start_time"]).isoformat(
+                    timespec="minutes"
+                ),
+                "matches": [
+                    {"question": line["question"], "text": line["text"]}
+                    for line in reversed(lines)
+                ],
+            }
+        )
+    return results
+
+
+def render_results(results):
+    lines = []
+    for result in results:
+        lines.append(f"Session {result['session']} ({result['start']})")
+        for question, matches in groupby(result["matches"], key=itemgetter("question")):
+            lines.append(f"  {question}")
+            lines.extend(f"    {match['text']}" for match in matches)
+    return "\n".join(lines)
+
+
+def print_search(query, question=None, limit=20, as_json=False):
+    with span("search notes"):
+        results = search_sessions(query, question, limit)
+    if as_json:
+        print(json.dumps(results, indent=2))
+    elif results:
+        print(render_results(results))
+    else:
+        print(f"No sessions match '{query}'.")
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import time
+
+from constants import SESSION_INFO_FILE
+
+# Kept to json/os/time so a status bar can run this every second.
+STATE_VERSION = 1
+
+
+def write_state(state, path=SESSION_INFO_FILE):
+    # Only start writes the state, so status doesn't pay for importing tempfile.
+    import tempfile
+
+    # Readers must never see half a file, so write a sibling and rename it over.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+    try:
+        with open(fd, "w") as f:
+            # mkstemp creates it 0600, but status runs without sudo.
+            os.fchmod(fd, 0o644)
+            json.dump({"version": STATE_VERSION, **state}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_state(path=SESSION_INFO_FILE):
+    try:
+        with open(path, "rb", buffering=0) as f:
+            data = f.readall()
+    except FileNotFoundError:
+        return None
+    try:
+        state = json.loads(data)
+    except ValueError:
+        # Written by an older version, or not ours.
+        return None
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def clear_state(path=SESSION_INFO_FILE):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def is_running(state):
+    try:
+        os.kill(state["pid"], 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Owned by root, but alive.
+        pass
+    return True
+
+
+def format_clock(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+
+def describe_state(state, now=None):
+    now = now or time.time()
+    status_str = f"Work session {state['session']}: "
+    if not is_running(state):
+        return status_str + "its process is gone. Run 'end' to clean up."
+    if state["finished"]:
+        return status_str + "finished. Run 'end' to write your notes."
+    if state["end_time"] is None:
+        status_str += f"{format_clock(now - state['start_time'])} elapsed (continuous)"
+    else:
+        end_str = time.strftime("%H:%M", time.localtime(state["end_time"]))
+        remaining = max(0, state["end_time"] - now)
+        status_str += f"{format_clock(remaining)} left (until {end_str})"
+    if state["all_sites"]:
+        return status_str + ", allowing all sites."
+    if state["domains"]:
+        return (
+            status_str
+            + f", blocking {len(state['domains'])} domains ({", ".join(state['blocked'])})."
+        )
+    return status_str + ", no sites blocked."
+
+
+def print_status(as_json=False):
+    state = read_state()
+    if as_json:
+        print(json.dumps(state))
+    elif state:
+        print(describe_state(state))
+    else:
+        print("No active session.")
+    return state is not None
+
+
+if __name__ == "__main__":
+    sys.exit(0 if print_status("--json" in sys.argv[1:]) else 1)
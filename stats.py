@@ -0,0 +1,131 @@
+import json
+from array import array
+from datetime import date, timedelta
+from itertools import compress, repeat
+from operator import attrgetter, ne, sub
+
+from notes import format_timedelta
+from store import get_session_columns
+
+PERCENTILES = [50, 90, 99]
+
+
+def period_keys(starts, period):
+    days = list(map(date.fromtimestamp, starts))
+    if period == "day":
+        return array("l", map(date.toordinal, days))
+    if period == "week":
+        # Ordinal 1 is a Monday, so this buckets Monday-to-Sunday weeks.
+        return array("l", ((o - 1) // 7 for o in map(date.toordinal, days)))
+    years = map(attrgetter("year"), days)
+    months = map(attrgetter("month"), days)
+    return array("l", (y * 12 + m - 1 for y, m in zip(years, months)))
+
+
+def period_label(key, period):
+    if period == "day":
+        return date.fromordinal(key).isoformat()
+    if period == "week":
+        return f"week of {date.fromordinal(key * 7 + 1).isoformat()}"
+    return f"{key // 12}-{key % 12 + 1:02}"
+
+
+def group_boundaries(keys):
+    # Keys are sorted, so each group ends wherever the key changes.
+    changes = compress(range(1, len(keys)), map(ne, keys, keys[1:]))
+    return [0, *changes, len(keys)]
+
+
+def rollup(keys, durations, limit):
+    bounds = group_boundaries(keys)[-limit - 1 :]
+    return [
+        {
+            "key": keys[start],
+            "sessions": end - start,
+            "total": sum(durations[start:end]),
+        }
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
+
+def percentiles(durations):
+    ordered = sorted(durations)
+    return {
+        p: ordered[min(len(ordered) - 1, (len(ordered) * p + 99) // 100 - 1)]
+        for p in PERCENTILES
+    }
+
+
+def streaks(day_keys, today):
+    days = [day_keys[i] for i in group_boundaries(day_keys)[:-1]]
+    # A streak is broken wherever two active days are not consecutive.
+    gaps = map(ne, map(sub, days[1:], days[:-1]), repeat(1))
+    breaks = [0, *compress(range(1, len(days)), gaps), len(days)]
+    longest = max(map(sub, breaks[1:], breaks[:-1]))
+    # The current streak survives until a full day has been missed.
+    current = len(days) - breaks[-2] if today - days[-1] <= 1 else 0
+    return {"current": current, "longest": longest}
+
+
+def compute_stats(starts, durations, period, limit, today=None):
+    today = today or date.today().toordinal()
+    total = sum(durations)
+    keys = period_keys(starts, period)
+    day_keys = keys if period == "day" else period_keys(starts, "day")
+    periods = rollup(keys, durations, limit)
+    return {
+        "sessions": len(durations),
+        "total": total,
+        "average": total // len(durations),
+        "percentiles": percentiles(durations),
+        "longest": max(durations),
+        "streaks": streaks(day_keys, today),
+        "period": period,
+        "periods": [
+            {
+                "period": period_label(p["key"], period),
+                "sessions": p["sessions"],
+                "total": p["total"],
+                "average": p["total"] // p["sessions"],
+            }
+            for p in periods
+        ],
+    }
+
+
+def format_seconds(seconds):
+    return format_timedelta(timedelta(seconds=seconds))
+
+
+def render_table(stats):
+    lines = [
+        f"Sessions: {stats['sessions']}",
+        f"Total focus time: {format_seconds(stats['total'])}",
+        f"Average session: {format_seconds(stats['average'])}",
+        "Session length percentiles: "
+        + ", ".join(
+            f"p{p} {format_seconds(v)}" for p, v in stats["percentiles"].items()
+        ),
+        f"Longest session: {format_seconds(stats['longest'])}",
+        f"Current streak: {stats['streaks']['current']} days "
+        f"(longest {stats['streaks']['longest']} days)",
+        "",
+    ]
+    header = f"{stats['period'].capitalize():<22}{'Sessions':>10}  {'Total':<22}Average"
+    lines.append(header)
+    lines.append("-" * len(header))
+    for p in stats["periods"]:
+        lines.append(
+            f"{p['period']:<22}{p['sessions']:>10}  "
+            f"{format_seconds(p['total']):<22}{format_seconds(p['average'])}"
+        )
+    return "\n".join(lines)
+
+
+def print_stats(period="day", limit=14, as_json=False):
+    starts, durations = get_session_columns()
+    if not durations:
+        print("No sessions recorded yet. Run a session first.")
+        return
+    stats = compute_stats(starts, durations, period, limit)
+    print(json.dumps(stats, indent=2) if as_json else render_table(stats))
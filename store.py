@@ -0,0 +1,810 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+
+from constants import (
+    ARCHIVES_DIR,
+    COLLECTED_SESSIONS_DIR,
+    NOTES_DIR,
+    SESSION_DB_FILE,
+    SESSION_TRACKER_FILE,
+)
+from notes import (
+    collected_note_path,
+    parse_duration,
+    parse_note,
+    parse_notes,
+    session_note_path,
+)
+from tracing import span
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    number INTEGER PRIMARY KEY,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    duration INTEGER NOT NULL,
+    divider TEXT,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_start_duration ON sessions (start_time, duration);
+CREATE TABLE IF NOT EXISTS answers (
+    session INTEGER NOT NULL REFERENCES sessions (number) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (session, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS days (
+    number INTEGER PRIMARY KEY,
+    first_session INTEGER NOT NULL,
+    last_session INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+# Applied in order on top of SCHEMA; PRAGMA user_version records how many have run.
+SCHEMA_UPGRADES = [
+    # Stat of the note each session was last read from or written to.
+    """
+    ALTER TABLE sessions ADD COLUMN mtime_ns INTEGER;
+    ALTER TABLE sessions ADD COLUMN size INTEGER;
+    ALTER TABLE sessions ADD COLUMN inode INTEGER;
+    """,
+    # Replaced by sessions_by_start_duration.
+    """
+    DROP INDEX IF EXISTS sessions_by_start;
+    """,
+    # Journal of tweets posted per note, so a thread that failed halfway can resume.
+    """
+    CREATE TABLE posts (
+        note TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        tweet_id TEXT NOT NULL,
+        posted REAL NOT NULL,
+        PRIMARY KEY (note, digest, position)
+    ) WITHOUT ROWID;
+    """,
+    # Where each archived note lives: a zip member's local header offset, its
+    # compressed size and CRC, so it can be read without the zip's directory.
+    """
+    CREATE TABLE archived (
+        path TEXT PRIMARY KEY,
+        archive TEXT NOT NULL,
+        offset INTEGER NOT NULL,
+        compressed_size INTEGER NOT NULL,
+        crc INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    """,
+    # Full-text index of every answer line, written alongside answers. Its rowid
+    # packs (session, position), so a session's lines are one rowid range.
+    """
+    CREATE VIRTUAL TABLE answers_search USING fts5 (
+        text,
+        question UNINDEXED,
+        session UNINDEXED,
+        tokenize = "unicode61 remove_diacritics 2"
+    );
+    INSERT INTO answers_search (rowid, text, question, session)
+    SELECT (session << 20) + position, text, question, session FROM answers;
+    """,
+]
+
+LEGACY_NOTE_PATTERN = re.compile(r"session_(\d+)\.md$")
+LEGACY_DAY_PATTERN = re.compile(r"day_(\d+)_sessions_(\d+)_to_(\d+)\.md$")
+LEGACY_TOTAL_PATTERN = re.compile(r"Total duration: (.+)")
+
+MMAP_SIZE = 256 * 1024 * 1024
+
+_db = None
+_state = None
+# The batch publisher journals posts from several threads over the one connection.
+_journal_lock = threading.Lock()
+
+
+def get_db():
+    global _db
+    if _db is None:
+        fresh = not os.path.exists(SESSION_DB_FILE)
+        _db = sqlite3.connect(SESSION_DB_FILE, check_same_thread=False)
+        _db.row_factory = sqlite3.Row
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("PRAGMA synchronous=NORMAL")
+        _db.execute("PRAGMA foreign_keys=ON")
+        # Lets searches read the index's pages straight from the page cache.
+        _db.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        _db.executescript(SCHEMA)
+        version = _db.execute("PRAGMA user_version").fetchone()[0]
+        for upgrade in SCHEMA_UPGRADES[version:]:
+            _db.executescript(upgrade)
+        _db.execute(f"PRAGMA user_version = {len(SCHEMA_UPGRADES)}")
+        # start/end run under sudo; keep the store writable by the real user. The
+        # WAL and shared-memory files stay open as long as this connection, so a
+        # root-owned pair would lock out every unprivileged run meanwhile.
+        if sudo_uid := os.environ.get("SUDO_UID"):
+            for suffix in ["", "-wal", "-shm"]:
+                if os.path.exists(SESSION_DB_FILE + suffix):
+                    os.chown(
+                        SESSION_DB_FILE + suffix,
+                        int(sudo_uid),
+                        int(os.environ["SUDO_GID"]),
+                    )
+        if fresh:
+            if os.path.exists(SESSION_TRACKER_FILE) or os.path.exists(NOTES_DIR):
+                with span("migrate legacy notes"):
+                    _migrate_legacy(_db)
+    return _db
+
+
+def get_meta(key, default=None):
+    row = get_db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+class TrackerState:
+    # The counters and settings in meta, read once per process. Changes stay in
+    # memory until a transaction writes them, all at once, with what it stored.
+    def __init__(self, db):
+        self.db = db
+        self.values = self._load()
+        self.changes = {}
+
+    def _load(self):
+        return {
+            key: json.loads(value)
+            for key, value in self.db.execute("SELECT key, value FROM meta")
+        }
+
+    def get(self, key, default=None):
+        return self.changes.get(key, self.values.get(key, default))
+
+    def set(self, key, value):
+        self.changes[key] = value
+
+    def next_session_number(self):
+        number = self.get("session_number", 1)
+        self.set("session_number", number + 1)
+        return number
+
+    def next_day_number(self):
+        number = self.get("day_number", 0) + 1
+        self.set("day_number", number)
+        return number
+
+    @contextmanager
+    def transaction(self):
+        # IMMEDIATE takes the store's write lock before the counters are re-read,
+        # so an overlapping run waits here instead of handing out the same number.
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.values = self._load()
+            yield self
+            self.db.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                ((key, json.dumps(value)) for key, value in self.changes.items()),
+            )
+        except BaseException:
+            self.db.rollback()
+            raise
+        self.db.commit()
+        self.values.update(self.changes)
+        self.changes = {}
+
+
+def get_state():
+    global _state
+    if _state is None:
+        _state = TrackerState(get_db())
+    return _state
+
+
+def get_session_number():
+    return get_state().get("session_number", 1)
+
+
+def read_default_divider():
+    return get_state().get("default_divider")
+
+
+def set_default_divider(divider):
+    # Saved by the next transaction, with the session or day it is used for.
+    get_state().set("default_divider", divider)
+
+
+def note_stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _unindex_sessions(db, numbers):
+    db.executemany(
+        "DELETE FROM answers_search WHERE rowid BETWEEN ? AND ?",
+        ((n << 20, ((n + 1) << 20) - 1) for n in numbers),
+    )
+
+
+def _insert_session(
+    db, number, start_time, end_time, duration, divider, answers, path, stat
+):
+    db.execute(
+        "INSERT OR REPLACE INTO sessions "
+        "(number, start_time, end_time, duration, divider, path, mtime_ns, size, inode) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (number, start_time, end_time, duration, divider, path, *stat),
+    )
+    db.execute("DELETE FROM answers WHERE session = ?", (number,))
+    _unindex_sessions(db, (number,))
+    lines = list(enumerate((q, line) for q, lines in answers.items() for line in lines))
+    db.executemany(
+        "INSERT INTO answers (session, position, question, text) VALUES (?, ?, ?, ?)",
+        ((number, position, question, text) for position, (question, text) in lines),
+    )
+    # Inserted in one batch; an FTS5 insert per row from a trigger is several
+    # times slower when migrating thousands of notes.
+    db.executemany(
+        "INSERT INTO answers_search (rowid, text, question, session) VALUES (?, ?, ?, ?)",
+        (
+            ((number << 20) + position, text, question, number)
+            for position, (question, text) in lines
+        ),
+    )
+
+
+def add_session(number, start_time, end_time, divider, answers, path):
+    # Runs in a TrackerState transaction, which commits it.
+    _insert_session(
+        get_db(),
+        number,
+        start_time,
+        end_time,
+        round(end_time - start_time),
+        divider,
+        answers,
+        path,
+        note_stat(path),
+    )
+
+
+def read_note(path):
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        row = (
+            get_db()
+            .execute("SELECT * FROM archived WHERE path = ?", (path,))
+            .fetchone()
+        )
+        if row is None:
+            raise
+    # Only archived notes need the zip reader, so it stays off the start/end path.
+    from note_archive import read_member
+
+    with span("read archived note"):
+        return read_member(
+            row["archive"], row["offset"], row["compressed_size"], row["crc"]
+        )
+
+
+def note_exists(path):
+    if os.path.exists(path):
+        return True
+    return (
+        get_db().execute("SELECT 1 FROM archived WHERE path = ?", (path,)).fetchone()
+        is not None
+    )
+
+
+def _read_if_changed(row):
+    stat = note_stat(row["path"])
+    if stat is None or stat == (row["mtime_ns"], row["size"], row["inode"]):
+        return stat, None
+    try:
+        with open(row["path"], "r") as f:
+            return stat, f.read()
+    except FileNotFoundError:
+        return None, None
+
+
+def refresh_sessions(first_session=1, last_session=None, jobs=1, processes=False):
+    db = get_db()
+    if last_session is None:
+        last_session = db.execute("SELECT MAX(number) FROM sessions").fetchone()[0] or 0
+    rows = db.execute(
+        "SELECT number, end_time, duration, path, mtime_ns, size, inode "
+        "FROM sessions WHERE number BETWEEN ? AND ? "
+        # Archived notes can't be edited; there is nothing to check.
+        "AND path NOT IN (SELECT path FROM archived) ORDER BY number",
+        (first_session, last_session),
+    ).fetchall()
+
+    # Stats and reads are latency bound (eg, network home directories), so they
+    # can overlap in threads; map keeps the results in session order either way.
+    with span("check notes for edits"):
+        if jobs > 1:
+            # Imported here, like the process pool below: concurrent.futures alone
+            # costs a session start more than the rest of the store.
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(jobs) as pool:
+                results = list(pool.map(_read_if_changed, rows))
+        else:
+            results = list(map(_read_if_changed, rows))
+
+    deleted = [row["number"] for row, (stat, _) in zip(rows, results) if stat is None]
+    edited = [
+        (row, stat, content)
+        for row, (stat, content) in zip(rows, results)
+        if content is not None
+    ]
+    if not deleted and not edited:
+        return
+
+    contents = [content for _, _, content in edited]
+    with span("parse edited notes"):
+        if processes and jobs > 1 and len(contents) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(jobs) as pool:
+                chunksize = max(1, len(contents) // (jobs * 4))
+                notes = list(pool.map(parse_note, contents, chunksize=chunksize))
+        else:
+            notes = list(map(parse_note, contents))
+
+    with span("store edited notes"), db:
+        db.executemany("DELETE FROM sessions WHERE number = ?", ((n,) for n in deleted))
+        _unindex_sessions(db, deleted)
+        for note, (row, stat, _) in zip(notes, edited):
+            end_time = row["end_time"]
+            duration = row["duration"]
+            if note["end"] is not None:
+                end_time = note["end"]
+                # Either field may have been dropped for not parsing; the stored
+                # duration stands in when neither gives one.
+                if note["start"] is not None:
+                    duration = round(end_time - note["start"])
+                elif note["duration"] is not None:
+                    duration = note["duration"]
+            # Old notes only show whole minutes in the heading, so keep the stored
+            # seconds unless the duration itself was edited.
+            elif (
+                note["duration"] is not None and note["duration"] != duration // 60 * 60
+            ):
+                duration = note["duration"]
+            _insert_session(
+                db,
+                row["number"],
+                end_time - duration,
+                end_time,
+                duration,
+                note["divider"],
+                note["answers"],
+                row["path"],
+                stat,
+            )
+
+
+def refresh_days():
+    db = get_db()
+    deleted = [
+        (row["number"],)
+        for row in db.execute(
+            "SELECT number, path FROM days "
+            "WHERE path NOT IN (SELECT path FROM archived)"
+        )
+        if not os.path.exists(row["path"])
+    ]
+    if deleted:
+        with db:
+            db.executemany("DELETE FROM days WHERE number = ?", deleted)
+
+
+def add_day(number, first_session, last_session, duration, path, created):
+    # Runs in a TrackerState transaction, which commits it.
+    get_db().execute(
+        "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?, ?)",
+        (number, first_session, last_session, duration, path, created),
+    )
+
+
+def get_sessions(first_session, last_session):
+    return (
+        get_db()
+        .execute(
+            "SELECT * FROM sessions WHERE number BETWEEN ? AND ? ORDER BY number",
+            (first_session, last_session),
+        )
+        .fetchall()
+    )
+
+
+def get_answers(first_session, last_session):
+    return get_db().execute(
+        "SELECT session, question, text FROM answers "
+        "WHERE session BETWEEN ? AND ? ORDER BY session, position",
+        (first_session, last_session),
+    )
+
+
+def search_answers(match, question=None):
+    # Newest sessions first; the rowid order lets a caller stop reading early.
+    sql = (
+        "SELECT answers_search.session AS session, answers_search.question AS question, "
+        "highlight(answers_search, 0, '**', '**') AS text, sessions.start_time AS start_time "
+        "FROM answers_search JOIN sessions ON sessions.number = answers_search.session "
+        "WHERE answers_search MATCH ?"
+    )
+    params = [match]
+    if question is not None:
+        sql += " AND answers_search.question = ?"
+        params.append(question)
+    return get_db().execute(sql + " ORDER BY answers_search.rowid DESC", params)
+
+
+def reindex(jobs=1):
+    # Re-reads every note edited since it was stored, which also reindexes it.
+    refresh_sessions(1, None, jobs)
+    db = get_db()
+    with span("optimize search index"), db:
+        db.execute("INSERT INTO answers_search (answers_search) VALUES ('optimize')")
+
+
+def get_last_session_number():
+    return get_db().execute("SELECT MAX(number) FROM sessions").fetchone()[0] or 0
+
+
+def iter_sessions(first_session, last_session):
+    # Each session with its (question, text) answer lines, in number order. Both
+    # queries are read a row at a time and merged, so memory stays flat however
+    # long the history is.
+    db = get_db()
+    sessions = db.execute(
+        "SELECT number, start_time, end_time, duration, divider, path FROM sessions "
+        "WHERE number BETWEEN ? AND ? ORDER BY number",
+        (first_session, last_session),
+    )
+    answers = db.execute(
+        "SELECT session, question, text FROM answers "
+        "WHERE session BETWEEN ? AND ? ORDER BY session, position",
+        (first_session, last_session),
+    )
+    answer = next(answers, None)
+    for session in sessions:
+        # Answers of a session dropped in between the two queries are skipped.
+        while answer is not None and answer["session"] < session["number"]:
+            answer = next(answers, None)
+        lines = []
+        while answer is not None and answer["session"] == session["number"]:
+            lines.append((answer["question"], answer["text"]))
+            answer = next(answers, None)
+        yield session, lines
+
+
+def get_session_columns():
+    cursor = get_db().cursor()
+    # Plain tuples; building a Row per session is wasted work here.
+    cursor.row_factory = None
+    cursor.execute("SELECT start_time, duration FROM sessions ORDER BY start_time")
+    starts = array("d")
+    durations = array("q")
+    while chunk := cursor.fetchmany(4096):
+        chunk_starts, chunk_durations = zip(*chunk)
+        starts.extend(chunk_starts)
+        durations.extend(chunk_durations)
+    return starts, durations
+
+
+def sessions_started_between(since, until):
+    # A range seek on sessions_by_start_duration, which every insert keeps sorted.
+    return (
+        get_db()
+        .execute(
+            "SELECT MIN(number), MAX(number) FROM sessions "
+            "WHERE start_time >= ? AND start_time < ?",
+            (since, until),
+        )
+        .fetchone()
+    )
+
+
+def iter_session_starts():
+    # (number, start_time) in start order, read straight off the index.
+    cursor = get_db().cursor()
+    cursor.row_factory = None
+    return cursor.execute("SELECT number, start_time FROM sessions ORDER BY start_time")
+
+
+def get_day_ranges():
+    return (
+        get_db()
+        .execute("SELECT first_session, last_session FROM days ORDER BY first_session")
+        .fetchall()
+    )
+
+
+def list_sessions(before=None, limit=-1):
+    # Newest first, one page at a time: pass the last number of a page as `before`
+    # to get the next one.
+    return (
+        get_db()
+        .execute(
+            "SELECT number, path FROM sessions WHERE number < ? "
+            "ORDER BY number DESC LIMIT ?",
+            (before or 2**63 - 1, limit),
+        )
+        .fetchall()
+    )
+
+
+def list_days(before=None, limit=-1):
+    return (
+        get_db()
+        .execute(
+            "SELECT number, path FROM days WHERE number < ? "
+            "ORDER BY number DESC LIMIT ?",
+            (before or 2**63 - 1, limit),
+        )
+        .fetchall()
+    )
+
+
+def get_posted_tweets(note, digest):
+    with _journal_lock:
+        rows = get_db().execute(
+            "SELECT tweet_id FROM posts WHERE note = ? AND digest = ? ORDER BY position",
+            (note, digest),
+        )
+        return [row[0] for row in rows]
+
+
+def record_post(note, digest, position, total, tweet_id):
+    # Committed right away: a crash after this must never post the same tweet twice.
+    db = get_db()
+    with _journal_lock, db:
+        db.execute(
+            "INSERT OR REPLACE INTO posts (note, digest, position, total, tweet_id, posted) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (note, digest, position, total, tweet_id, time.time()),
+        )
+
+
+def clear_posts(note):
+    db = get_db()
+    with _journal_lock, db:
+        db.execute("DELETE FROM posts WHERE note = ?", (note,))
+
+
+def get_unfinished_thread():
+    return (
+        get_db()
+        .execute(
+            "SELECT note, digest, total, COUNT(*) AS posted FROM posts "
+            "GROUP BY note, digest HAVING COUNT(*) < total "
+            "ORDER BY MAX(posted) DESC LIMIT 1"
+        )
+        .fetchone()
+    )
+
+
+def migrate_legacy():
+    fresh = not os.path.exists(SESSION_DB_FILE)
+    db = get_db()
+    # A fresh store has already imported the legacy files while being opened.
+    if not fresh:
+        _migrate_legacy(db)
+
+
+def shard_notes(batch=1000):
+    # Moves notes into their month folders in place. The store is updated in
+    # batches; if a run is cut short, the next one finds the moved notes where
+    # they belong and only updates their rows.
+    db = get_db()
+    moves = []
+    for row in db.execute(
+        "SELECT number, start_time, path FROM sessions "
+        "WHERE path NOT IN (SELECT path FROM archived)"
+    ):
+        when = datetime.fromtimestamp(row["start_time"])
+        target = session_note_path(row["number"], when)
+        if row["path"] != target:
+            moves.append(("sessions", row["number"], row["path"], target))
+    for row in db.execute(
+        "SELECT number, first_session, last_session, created, path FROM days "
+        "WHERE path NOT IN (SELECT path FROM archived)"
+    ):
+        target = collected_note_path(
+            row["number"],
+            row["first_session"],
+            row["last_session"],
+            datetime.fromtimestamp(row["created"]),
+        )
+        if row["path"] != target:
+            moves.append(("days", row["number"], row["path"], target))
+
+    moved = {"sessions": 0, "days": 0}
+    for start in range(0, len(moves), batch):
+        updates = []
+        for table, number, source, target in moves[start : start + batch]:
+            if os.path.exists(target):
+                if os.path.exists(source):
+                    print(f"Warning: {target} already exists; leaving {source}.")
+                    continue
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    os.rename(source, target)
+                except FileNotFoundError:
+                    # Deleted by hand; the next refresh drops it from the store.
+                    continue
+            updates.append((table, number, source, target))
+            moved[table] += 1
+        with db:
+            for table, number, source, target in updates:
+                db.execute(
+                    f"UPDATE {table} SET path = ? WHERE number = ?", (target, number)
+                )
+                db.execute("UPDATE posts SET note = ? WHERE note = ?", (target, source))
+    return moved["sessions"], moved["days"]
+
+
+def archive_notes(cutoff):
+    # Rolls session notes that started, and collected notes written, before
+    # `cutoff` into a new zip under ARCHIVES_DIR. Returns how many were archived.
+    from note_archive import write_archive
+
+    db = get_db()
+    candidates = db.execute(
+        "SELECT number FROM sessions WHERE start_time < ? "
+        "AND path NOT IN (SELECT path FROM archived) ORDER BY number",
+        (cutoff,),
+    ).fetchall()
+    # Pick up hand edits (and deletions) before the notes are frozen.
+    if candidates:
+        refresh_sessions(candidates[0]["number"], candidates[-1]["number"])
+    refresh_days()
+    paths = [
+        row["path"]
+        for row in db.execute(
+            "SELECT path FROM sessions WHERE start_time < ? "
+            "AND path NOT IN (SELECT path FROM archived) "
+            "UNION ALL SELECT path FROM days WHERE created < ? "
+            "AND path NOT IN (SELECT path FROM archived)",
+            (cutoff, cutoff),
+        )
+    ]
+    paths = [path for path in paths if os.path.exists(path)]
+
+    if paths:
+        os.makedirs(ARCHIVES_DIR, exist_ok=True)
+        name = f"notes_{datetime.now():%Y%m%d_%H%M%S}"
+        archive = os.path.join(ARCHIVES_DIR, f"{name}.zip")
+        copies = 1
+        while os.path.exists(archive):
+            copies += 1
+            archive = os.path.join(ARCHIVES_DIR, f"{name}_{copies}.zip")
+        with span("write archive"):
+            members = write_archive(archive, paths)
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO archived VALUES (?, ?, ?, ?, ?)",
+                ((path, archive, *member) for path, *member in members),
+            )
+
+    # Only now that the store points into the archive; notes left behind by a run
+    # that was cut short are removed by the next one.
+    with span("remove archived notes"):
+        for (path,) in db.execute("SELECT path FROM archived").fetchall():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return len(paths)
+
+
+def _walk_notes(directory):
+    # Both the old flat layout and the month folders.
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            yield os.path.join(dirpath, filename)
+
+
+def _migrate_legacy(db):
+    tracker = {}
+    if os.path.exists(SESSION_TRACKER_FILE):
+        with open(SESSION_TRACKER_FILE, "r") as f:
+            tracker = json.load(f)
+
+    migrated_sessions = 0
+    migrated_days = 0
+    with db:
+        if os.path.exists(NOTES_DIR):
+            stored = {row[0] for row in db.execute("SELECT number FROM sessions")}
+            paths = {}
+            for path in _walk_notes(NOTES_DIR):
+                if m := LEGACY_NOTE_PATTERN.match(os.path.basename(path)):
+                    if int(m.group(1)) not in stored:
+                        paths[path] = int(m.group(1))
+
+            for note in parse_notes(paths):
+                stat = note_stat(note["path"])
+                # Notes without front matter don't record when they happened, so
+                # anchor them on the time the note was written, when the session ended.
+                end_time = note["end"] if note["end"] is not None else stat[0] / 1e9
+                if note["start"] is not None and note["end"] is not None:
+                    duration = round(end_time - note["start"])
+                else:
+                    duration = note["duration"] or 0
+                _insert_session(
+                    db,
+                    paths[note["path"]],
+                    end_time - duration,
+                    end_time,
+                    duration,
+                    note["divider"],
+                    note["answers"],
+                    note["path"],
+                    stat,
+                )
+                migrated_sessions += 1
+
+        if os.path.exists(COLLECTED_SESSIONS_DIR):
+            for path in _walk_notes(COLLECTED_SESSIONS_DIR):
+                if not (m := LEGACY_DAY_PATTERN.match(os.path.basename(path))):
+                    continue
+                with open(path, "r") as f:
+                    total = LEGACY_TOTAL_PATTERN.search(f.read())
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO days VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        int(m.group(1)),
+                        int(m.group(2)),
+                        int(m.group(3)),
+                        parse_duration(total.group(1)) if total else 0,
+                        path,
+                        os.path.getmtime(path),
+                    ),
+                )
+                migrated_days += cursor.rowcount
+
+        last_session = db.execute("SELECT MAX(number) FROM sessions").fetchone()[0] or 0
+        last_day = db.execute("SELECT MAX(number) FROM days").fetchone()[0] or 0
+        counters = {
+            "session_number": max(
+                tracker.get("session_number", 1),
+                last_session + 1,
+                get_meta("session_number", 1),
+            ),
+            "day_number": max(
+                tracker.get("day_number", 0), last_day, get_meta("day_number", 0)
+            ),
+        }
+        if "default_divider" in tracker and get_meta("default_divider") is None:
+            counters["default_divider"] = tracker["default_divider"]
+        db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            ((key, json.dumps(value)) for key, value in counters.items()),
+        )
+
+    if migrated_sessions or migrated_days:
+        print(
+            f"Migrated {migrated_sessions} session notes and {migrated_days} collected notes into {SESSION_DB_FILE}."
+        )
@@ -0,0 +1,25 @@
+import shlex
+import subprocess
+
+from constants import CLIPBOARD_COMMAND, FLUSH_DNS_COMMAND
+from tracing import span
+
+
+def _run(command, text=None):
+    if not command:
+        return
+    try:
+        subprocess.run(shlex.split(command), input=text, text=True)
+    except FileNotFoundError:
+        # Not on macOS; there's nothing to copy to or flush.
+        pass
+
+
+def copy_to_clipboard(text):
+    with span("copy to clipboard"):
+        _run(CLIPBOARD_COMMAND, text)
+
+
+def flush_dns_cache():
+    with span("flush DNS cache"):
+        _run(FLUSH_DNS_COMMAND)
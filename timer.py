@@ -0,0 +1,75 @@
+import threading
+import time
+
+# Event.wait runs on the monotonic clock, which stops while the machine is
+# suspended, so no wait is trusted for longer than this against the wall clock.
+MAX_WAIT = 5 * 60
+
+
+class SessionTimer:
+    # Blocks until the deadline, a scheduled notification or stop(), waking at
+    # least every MAX_WAIT to check the wall clock in case the machine slept.
+    def __init__(self, end_time=None, notifications=(), clock=time.time, wait=None):
+        self.end_time = end_time
+        # (seconds before the end, callback), earliest first.
+        self.schedule = sorted(notifications, key=lambda n: -n[0])
+        self.notifications = list(self.schedule)
+        self.clock = clock
+        self.wakeup = threading.Event()
+        self.wait = wait or self.wakeup.wait
+        self.stopped = False
+        self.wakeups = 0
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+
+    def extend(self, seconds):
+        if self.end_time is not None:
+            self.end_time += seconds
+            # Re-arm the notifications the new deadline puts back in the future.
+            now = self.clock()
+            self.notifications = [
+                n for n in self.schedule if self.end_time - n[0] > now
+            ]
+            self.wakeup.set()
+
+    def remaining(self):
+        if self.end_time is None:
+            return None
+        return max(0, self.end_time - self.clock())
+
+    def next_wakeup(self):
+        if self.end_time is None:
+            return None
+        for before, _ in self.notifications:
+            if self.end_time - before > self.clock():
+                return self.end_time - before
+        return self.end_time
+
+    def fire_due(self):
+        # After a suspend several notifications can be overdue; only the latest is still true.
+        due = [n for n in self.notifications if self.end_time - n[0] <= self.clock()]
+        if not due:
+            return
+        self.notifications = self.notifications[len(due) :]
+        if self.clock() < self.end_time:
+            due[-1][1](self.remaining())
+
+    def run(self):
+        # Returns True when the deadline passed, False when stopped early.
+        while not self.stopped:
+            if self.end_time is not None:
+                self.fire_due()
+                if self.clock() >= self.end_time:
+                    return True
+            wake_at = self.next_wakeup()
+            # A session ends at most MAX_WAIT after a resume that was past its end.
+            self.wait(
+                None
+                if wake_at is None
+                else min(MAX_WAIT, max(0, wake_at - self.clock()))
+            )
+            self.wakeups += 1
+            self.wakeup.clear()
+        return False
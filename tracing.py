@@ -0,0 +1,143 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+# What span() hands out while tracing is off: no clock reads, no allocation.
+NULL_SPAN = _NullSpan()
+
+
+class _Node:
+    # Every span with the same name under the same parent adds up in one node.
+    __slots__ = ("name", "children", "total", "count")
+
+    def __init__(self, name):
+        self.name = name
+        self.children = {}
+        self.total = 0.0
+        self.count = 0
+
+
+class _Span:
+    __slots__ = ("name", "node", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = _stack()
+        parent = stack[-1]
+        if (node := parent.children.get(self.name)) is None:
+            node = parent.children[self.name] = _Node(self.name)
+        self.node = node
+        stack.append(node)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        _stack().pop()
+        self.node.total += end - self.start
+        self.node.count += 1
+        if _events is not None:
+            _events.append(
+                {
+                    "name": self.name,
+                    "ph": "X",
+                    "ts": (self.start - _origin) * 1e6,
+                    "dur": (end - self.start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                }
+            )
+        return False
+
+
+_root = None
+_origin = 0.0
+_events = None
+_local = threading.local()
+
+
+def _stack():
+    # Spans opened on other threads hang off the root.
+    if (stack := getattr(_local, "stack", None)) is None:
+        stack = _local.stack = [_root]
+    return stack
+
+
+def enable(trace_events=False):
+    global _root, _origin, _events
+    _root = _Node("total")
+    _origin = time.perf_counter()
+    _events = [] if trace_events else None
+
+
+def enabled():
+    return _root is not None
+
+
+def span(name):
+    if _root is None:
+        return NULL_SPAN
+    return _Span(name)
+
+
+def print_tree(file=sys.stderr):
+    if _root is None:
+        return
+    _root.total = time.perf_counter() - _origin
+    _root.count = 1
+
+    def visit(node, depth):
+        share = f"{node.total / _root.total:6.1%}" if _root.total else ""
+        calls = f" x{node.count}" if node.count > 1 else ""
+        print(
+            f"{node.total * 1000:10.2f} ms {share}  {'  ' * depth}{node.name}{calls}",
+            file=file,
+        )
+        for child in sorted(node.children.values(), key=lambda n: -n.total):
+            visit(child, depth + 1)
+
+    visit(_root, 0)
+
+
+def start(output=""):
+    # Prints the timing tree when the process exits, however it exits. An output
+    # ending in .json gets the spans as trace events; any other gets a cProfile dump.
+    enable(trace_events=output.endswith(".json"))
+    profiler = None
+    if output and not output.endswith(".json"):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    atexit.register(_finish, output, profiler)
+
+
+def _finish(output, profiler):
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(output)
+    elif output:
+        write_trace_events(output)
+    print_tree()
+    if output:
+        print(f"Wrote {output}.", file=sys.stderr)
+
+
+def write_trace_events(path):
+    # Chrome's trace event format; open it in chrome://tracing or Perfetto.
+    with open(path, "w") as f:
+        json.dump({"traceEvents": _events or [], "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+
+import dotenv
+from requests_oauthlib import OAuth1Session
+
+from constants import X_API_BASE, X_CREDENTIALS_FILE
+from system import copy_to_clipboard
+from tracing import span
+
+REQUEST_TOKEN_URL = (
+    f"{X_API_BASE}/oauth/request_token?oauth_callback=oob&x_auth_access_type=write"
+)
+AUTHORIZATION_URL = f"{X_API_BASE}/oauth/authorize"
+ACCESS_TOKEN_URL = f"{X_API_BASE}/oauth/access_token"
+
+# One keep-alive session for every call this process makes to the API, shared
+# by the publisher's threads.
+_session = None
+_session_lock = threading.Lock()
+
+
+def load_consumer_credentials():
+    dotenv.load_dotenv()
+    consumer_key = os.environ.get("X_CLIENT_ID")
+    consumer_secret = os.environ.get("X_CLIENT_SECRET")
+    if not consumer_key or not consumer_secret:
+        print("Error: need both consumer key and secret to interact with the X API.")
+        exit(1)
+    return consumer_key, consumer_secret
+
+
+def read_cached_tokens(consumer_key):
+    try:
+        with open(os.path.expanduser(X_CREDENTIALS_FILE)) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Tokens belong to the app that was authorized; a new app key needs a new PIN.
+    if not isinstance(cached, dict) or cached.get("consumer_key") != consumer_key:
+        return None
+    return cached["oauth_token"], cached["oauth_token_secret"]
+
+
+def write_cached_tokens(consumer_key, access_token, access_token_secret):
+    path = os.path.expanduser(X_CREDENTIALS_FILE)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(fd, "w") as f:
+        # O_CREAT only applies the mode to new files.
+        os.fchmod(fd, 0o600)
+        json.dump(
+            {
+                "consumer_key": consumer_key,
+                "oauth_token": access_token,
+                "oauth_token_secret": access_token_secret,
+            },
+            f,
+        )
+    os.replace(tmp_path, path)
+
+
+def forget_cached_tokens():
+    try:
+        os.remove(os.path.expanduser(X_CREDENTIALS_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def authorize(consumer_key, consumer_secret):
+    # Get request token
+    oauth = OAuth1Session(consumer_key, client_secret=consumer_secret)
+    try:
+        fetch_response = oauth.fetch_request_token(REQUEST_TOKEN_URL)
+    except ValueError:
+        print(
+            "There may have been an issue with the consumer_key or consumer_secret you entered."
+        )
+        exit(1)
+
+    resource_owner_key = fetch_response.get("oauth_token")
+    resource_owner_secret = fetch_response.get("oauth_token_secret")
+    print("Got OAuth token: %s" % resource_owner_key)
+
+    # Get authorization
+    authorization_url = oauth.authorization_url(AUTHORIZATION_URL)
+    copy_to_clipboard(authorization_url)
+    print(
+        "Please go here and authorize (it has been copied to your clipboard): %s"
+        % authorization_url
+    )
+    verifier = input("Paste the PIN here: ")
+
+    # Get the access token
+    oauth = OAuth1Session(
+        consumer_key,
+        client_secret=consumer_secret,
+        resource_owner_key=resource_owner_key,
+        resource_owner_secret=resource_owner_secret,
+        verifier=verifier,
+    )
+    oauth_tokens = oauth.fetch_access_token(ACCESS_TOKEN_URL)
+    return oauth_tokens["oauth_token"], oauth_tokens["oauth_token_secret"]
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            consumer_key, consumer_secret = load_consumer_credentials()
+            with span("read cached X tokens"):
+                tokens = read_cached_tokens(consumer_key)
+            if tokens is None:
+                # The PIN prompt needs the terminal; a worker thread hands the
+                # failure back to the main thread instead.
+                if threading.current_thread() is not threading.main_thread():
+                    raise Exception("X needs authorizing again")
+                tokens = authorize(consumer_key, consumer_secret)
+                write_cached_tokens(consumer_key, *tokens)
+                print(f"Saved your X credentials to {X_CREDENTIALS_FILE}.")
+            _session = OAuth1Session(
+                consumer_key,
+                client_secret=consumer_secret,
+                resource_owner_key=tokens[0],
+                resource_owner_secret=tokens[1],
+            )
+        return _session
+
+
+def request(method, url, **kwargs):
+    global _session
+    session = get_session()
+    response = session.request(method, url, **kwargs)
+    if response.status_code == 401:
+        # The saved tokens were revoked; authorize again once and retry. Only the
+        # first request to see it forgets them, and other threads may still be
+        # using the old session, so it isn't closed here.
+        with _session_lock:
+            if _session is session:
+                print("X rejected the saved credentials.")
+                forget_cached_tokens()
+                _session = None
+        response = get_session().request(method, url, **kwargs)
+    return response
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from store import get_posted_tweets, note_exists
+from tracing import span
+from x_api.auth import get_session
+from x_api.tweet_session import (
+    post_thread,
+    read_session_note,
+    split_into_tweets,
+    thread_digest,
+)
+
+# X lets a user create 100 posts per 15-minute window; retries count against it too.
+POSTS_PER_WINDOW = 100
+RATE_LIMIT_WINDOW = 15 * 60
+BURST = 25
+
+
+class TokenBucket:
+    # Shared by every thread in a batch. A burst plus what refills over one window
+    # adds up to the limit, so no window, wherever X starts it, sees more than that.
+    def __init__(
+        self,
+        limit=POSTS_PER_WINDOW,
+        window=RATE_LIMIT_WINDOW,
+        burst=BURST,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.capacity = burst
+        self.rate = (limit - burst) / window
+        self.tokens = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.held_until = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(now - self.updated, 0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self._refill(now)
+                if now >= self.held_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.held_until - now, (1 - self.tokens) / self.rate)
+            self.sleep(wait)
+
+    def hold_until(self, when):
+        # X says the window is spent, whatever the bucket thinks.
+        with self.lock:
+            self.held_until = max(self.held_until, when)
+            self.tokens = 0
+
+
+def read_queue(path):
+    # One note per line, optionally followed by when to post it, eg
+    # "collected_sessions/2026/10/day_0003_sessions_000007_to_000009.md 2026-10-20 18:30".
+    queue = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            note, _, when = line.partition(" ")
+            post_at = None
+            if when.strip():
+                try:
+                    post_at = datetime.fromisoformat(when.strip()).timestamp()
+                except ValueError:
+                    print(
+                        f"Error: line {line_number} of {path} has an invalid time '{when.strip()}'."
+                    )
+                    exit(1)
+            if not note_exists(note):
+                print(f"Error: line {line_number} of {path}: {note} doesn't exist.")
+                exit(1)
+            queue.append((note, post_at))
+    return queue
+
+
+def publish(note_path, post_at, limiter, numbered=False):
+    if post_at is not None:
+        time.sleep(max(post_at - time.time(), 0))
+    tweets = split_into_tweets(read_session_note(note_path), numbered)
+    posted = get_posted_tweets(note_path, thread_digest(tweets))
+    if len(posted) == len(tweets):
+        return 0
+    # Always resumes, so running the same queue again finishes what a failure left.
+    with span("post thread"):
+        post_thread(tweets, note_path, resume=True, limiter=limiter, verbose=False)
+    return len(tweets) - len(posted)
+
+
+def publish_batch(queue, jobs=4, numbered=False, limiter=None):
+    if limiter is None:
+        limiter = TokenBucket()
+    # Authorize once here; a PIN prompt from a worker thread would be a mess.
+    get_session()
+    # Scheduled notes hold their worker while they wait, so start the earliest first.
+    queue = sorted(queue, key=lambda item: item[1] or 0)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(publish, note, post_at, limiter, numbered): note
+            for note, post_at in queue
+        }
+        for future in as_completed(futures):
+            note = futures[future]
+            name = os.path.basename(note)
+            try:
+                count = future.result()
+            except Exception as e:
+                print(f"{name}: stopped: {e}")
+                results[note] = None
+            else:
+                if count:
+                    print(f"{name}: posted {count} post{"s" if count > 1 else ""}.")
+                else:
+                    print(f"{name}: already posted, skipped.")
+                results[note] = count
+    return results
+
+
+def main(queue_path, jobs=4, numbered=False):
+    results = publish_batch(read_queue(queue_path), jobs, numbered)
+    failed = [note for note, count in results.items() if count is None]
+    print(
+        f"Posted {len(results) - len(failed)} of {len(results)} thread{"s" if len(results) > 1 else ""}."
+    )
+    if failed:
+        print(
+            f"Run 'python main.py tweet --queue {queue_path}' again to finish the rest."
+        )
+        exit(1)
@@ -0,0 +1,183 @@
+import re
+import unicodedata
+from collections import deque
+
+from constants import POSSIBLE_DIVIDERS
+
+TWEET_WEIGHT_LIMIT = 280
+# twitter-text v3: URLs count as a t.co link, emoji sequences as 2, and any code
+# point outside the ranges below as 2.
+URL_WEIGHT = 23
+EMOJI_WEIGHT = 2
+EMOJI_PART = r"[\u2600-\u27bf\U0001f000-\U0001faff](?:\ufe0f|[\U0001f3fb-\U0001f3ff])*"
+# Trailing punctuation isn't part of a link, so it still counts.
+URL_REST = r"\S*[^\s.,;:!?'\")\]]"
+# Bare domains are links too. Like twitter-text, a country-code domain is only
+# linked with a path, except .co and .tv; these are the common generic TLDs.
+GENERIC_TLDS = (
+    "com|net|org|edu|gov|mil|int|info|biz|name|pro|app|dev|page|blog|shop|store"
+    "|online|site|tech|xyz|cloud|news|media|link|live|club|art|design|social"
+)
+BARE_URL = (
+    r"(?<![\w@$#.\-/])(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+"
+    rf"(?:(?:{GENERIC_TLDS}|co|tv)(?![\w-])(?:/{URL_REST})?|[a-z]{{2}}/{URL_REST})"
+)
+TOKEN_PATTERN = re.compile(
+    rf"(?P<url>(?:https?://|www\.){URL_REST}|{BARE_URL})"
+    r"|(?P<emoji>[\U0001f1e6-\U0001f1ff]{2}|[#*0-9]\ufe0f?\u20e3"
+    rf"|{EMOJI_PART}(?:\u200d{EMOJI_PART})*)",
+    re.IGNORECASE,
+)
+HEAVY_PATTERN = re.compile(r"[^\u0000-\u10ff\u2000-\u200d\u2010-\u201f\u2032-\u2037]")
+BOLD_LINE_PATTERN = re.compile(r"\*\*(.+?)\*\*$")
+
+HEADING, BULLET, PARAGRAPH, CONTINUATION = range(4)
+# Cost of starting a new post before a unit of each kind, given what precedes it.
+BREAK_BEFORE_HEADING = 0
+BREAK_BETWEEN_LINES = 1
+BREAK_INSIDE_LINE = 5
+BREAK_AFTER_HEADING = 10
+
+
+def _plain_weight(text):
+    if text.isascii():
+        return len(text)
+    return len(text) + len(HEAVY_PATTERN.findall(text))
+
+
+def weighted_length(text):
+    text = unicodedata.normalize("NFC", text)
+    total = 0
+    pos = 0
+    for m in TOKEN_PATTERN.finditer(text):
+        total += _plain_weight(text[pos : m.start()])
+        total += URL_WEIGHT if m.lastgroup == "url" else EMOJI_WEIGHT
+        pos = m.end()
+    return total + _plain_weight(text[pos:])
+
+
+def _split_long_word(word, limit):
+    # Only for a single token longer than a whole post; cuts between code points.
+    if word.isascii():
+        return [word[i : i + limit] for i in range(0, len(word), limit)]
+    pieces = []
+    start = 0
+    weight = 0
+    for i, char in enumerate(word):
+        char_weight = _plain_weight(char)
+        if weight + char_weight > limit:
+            pieces.append(word[start:i])
+            start, weight = i, 0
+        weight += char_weight
+    pieces.append(word[start:])
+    return pieces
+
+
+def parse_units(text, limit):
+    # Each unit is (text, weighted length, kind, separator placed before it).
+    units = []
+    separator = ""
+    for line in unicodedata.normalize("NFC", text).splitlines():
+        line = line.strip()
+        if not line:
+            if units:
+                separator = "\n\n"
+            continue
+        if m := BOLD_LINE_PATTERN.match(line):
+            kind, line = HEADING, m.group(1)
+        elif line.startswith(tuple(POSSIBLE_DIVIDERS)):
+            kind = BULLET
+        else:
+            kind = PARAGRAPH
+        line = line.replace("**", "")
+
+        weight = weighted_length(line)
+        if weight <= limit:
+            units.append((line, weight, kind, separator))
+        else:
+            # Too long for one post: every word becomes a unit so the packing can
+            # fill posts word by word.
+            for word in line.split(" "):
+                weight = weighted_length(word)
+                if weight <= limit:
+                    pieces = [(word, weight)]
+                else:
+                    pieces = [
+                        (piece, weighted_length(piece))
+                        for piece in _split_long_word(word, limit)
+                    ]
+                for piece, weight in pieces:
+                    units.append((piece, weight, kind, separator))
+                    kind, separator = CONTINUATION, ""
+                separator = " "
+        separator = "\n"
+    return units
+
+
+def _break_cost(units, j):
+    # Cost of a post ending right before units[j].
+    if j == len(units):
+        return 0
+    kind = units[j][2]
+    if kind == HEADING:
+        return BREAK_BEFORE_HEADING
+    if kind == CONTINUATION:
+        return BREAK_INSIDE_LINE
+    if units[j - 1][2] == HEADING:
+        return BREAK_AFTER_HEADING
+    return BREAK_BETWEEN_LINES
+
+
+def pack(units, limit):
+    # dp[j] = (posts, break cost) for units[:j]; a post may hold units[i:j] when it
+    # fits, and the feasible i only ever move forward, so a monotonic deque over the
+    # window gives the best i in amortized O(1).
+    n = len(units)
+    prefix = [0]
+    for _, weight, _, separator in units:
+        prefix.append(prefix[-1] + len(separator) + weight)
+
+    dp = [(0, 0)] + [None] * n
+    best_start = [0] * (n + 1)
+    window = deque()
+    lo = 0
+    for j in range(1, n + 1):
+        candidate = j - 1
+        while window and dp[window[-1]] >= dp[candidate]:
+            window.pop()
+        window.append(candidate)
+        # A post starting at unit i doesn't include the separator before it.
+        while prefix[j] - prefix[lo] - len(units[lo][3]) > limit:
+            lo += 1
+        while window[0] < lo:
+            window.popleft()
+        i = window[0]
+        posts, cost = dp[i]
+        dp[j] = (posts + 1, cost + _break_cost(units, j))
+        best_start[j] = i
+
+    breaks = []
+    j = n
+    while j > 0:
+        breaks.append((best_start[j], j))
+        j = best_start[j]
+    breaks.reverse()
+    return [
+        "".join((units[k][3] if k > i else "") + units[k][0] for k in range(i, j))
+        for i, j in breaks
+    ]
+
+
+def split_thread(text, limit=TWEET_WEIGHT_LIMIT, numbered=False):
+    if not numbered:
+        return pack(parse_units(text, limit), limit)
+
+    # Reserve room for "\ni/n"; retry in the rare case n needs another digit.
+    digits = 1
+    while True:
+        reserve = 1 + 2 * digits + 1
+        posts = pack(parse_units(text, limit - reserve), limit - reserve)
+        if len(str(len(posts))) <= digits:
+            break
+        digits = len(str(len(posts)))
+    return [f"{post}\n{i}/{len(posts)}" for i, post in enumerate(posts, 1)]
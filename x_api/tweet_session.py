@@ -1,124 +1,176 @@
+import hashlib
 import os
-import re
-import subprocess
+import random
 import sys
 import time
-from textwrap import wrap
 
-import dotenv
-from requests_oauthlib import OAuth1Session
-
-from constants import COLLECTED_SESSIONS_DIR, NOTES_DIR
+import requests
+
+from constants import COLLECTED_SESSIONS_DIR, NOTES_DIR, X_API_BASE
+from notes import split_front_matter
+from store import (
+    clear_posts,
+    get_posted_tweets,
+    get_unfinished_thread,
+    list_days,
+    list_sessions,
+    read_note,
+    record_post,
+    refresh_days,
+    refresh_sessions,
+)
+from tracing import span
+from x_api.auth import request
+from x_api.splitter import split_thread
 
 if __name__ == "__main__":
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-dotenv.load_dotenv()
-
-consumer_key = os.environ.get("X_CLIENT_ID")
-consumer_secret = os.environ.get("X_CLIENT_SECRET")
-
-TWEET_CHAR_LIMIT = 280
+TWEETS_URL = f"{X_API_BASE}/2/tweets"
+REQUEST_TIMEOUT = 30
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 2
+MAX_BACKOFF = 120
+# Seconds added to x-rate-limit-reset, which only has one-second resolution.
+RATE_LIMIT_MARGIN = 1
+# Notes listed per page when choosing one to post, newest first.
+PAGE_SIZE = 20
 
 
 def read_session_note(filename):
-    with open(filename) as f:
-        return f.read()
+    # The note may have been rolled into an archive.
+    return read_note(filename)
 
 
-def clean_markdown(text):
-    text = re.sub(r"\*\*", "", text)
-    return text
+def split_into_tweets(text, numbered=False):
+    with span("split into tweets"):
+        _, text = split_front_matter(text)
+        return split_thread(text, numbered=numbered)
 
 
-def split_into_tweets(text):
-    cleaned_text = clean_markdown(text)
-    return wrap(
-        cleaned_text, TWEET_CHAR_LIMIT, replace_whitespace=False, drop_whitespace=False
-    )
+def backoff_delay(attempt):
+    # Full jitter keeps several retrying clients from landing on the same second.
+    return random.uniform(0, min(MAX_BACKOFF, BACKOFF_BASE * 2**attempt))
 
 
-def create_oauth_session():
-    # Get request token
-    request_token_url = "https://api.twitter.com/oauth/request_token?oauth_callback=oob&x_auth_access_type=write"
-    oauth = OAuth1Session(consumer_key, client_secret=consumer_secret)
+def post_tweet(payload, in_reply_to_id=None, limiter=None, label=""):
+    if in_reply_to_id:
+        payload["reply"] = {"in_reply_to_tweet_id": in_reply_to_id}
 
-    try:
-        fetch_response = oauth.fetch_request_token(request_token_url)
-    except ValueError:
-        print(
-            "There may have been an issue with the consumer_key or consumer_secret you entered."
-        )
-        exit(1)
+    for attempt in range(MAX_ATTEMPTS):
+        if limiter:
+            with span("wait for rate limit"):
+                limiter.acquire()
+        try:
+            with span("POST /2/tweets"):
+                response = request(
+                    "POST", TWEETS_URL, json=payload, timeout=REQUEST_TIMEOUT
+                )
+        except requests.ReadTimeout:
+            # X may have created the post before the response was lost, and the
+            # journal can't say; a retry could post it twice.
+            raise Exception(
+                f"X didn't answer within {REQUEST_TIMEOUT} seconds, so the post may or may not be up. Check on X, and delete it if it is, before resuming"
+            )
+        except requests.ConnectionError as e:
+            # Includes ConnectTimeout: the request never reached X.
+            reason = f"Connection failed ({e.__class__.__name__})"
+            delay = backoff_delay(attempt)
+        else:
+            if response.status_code == 201:
+                return response.json()
+            if response.status_code == 429:  # Rate limit exceeded
+                reason = "Rate limit exceeded"
+                if reset := response.headers.get("x-rate-limit-reset"):
+                    delay = max(int(reset) - time.time(), 0) + RATE_LIMIT_MARGIN
+                else:
+                    delay = backoff_delay(attempt)
+                if limiter:
+                    # The window is spent for every thread sharing the limiter, not just this one.
+                    limiter.hold_until(time.time() + delay)
+            elif response.status_code >= 500:
+                reason = f"X returned {response.status_code}"
+                delay = backoff_delay(attempt)
+            else:
+                raise Exception(
+                    f"Request returned an error: {response.status_code} {response.text}"
+                )
 
-    resource_owner_key = fetch_response.get("oauth_token")
-    resource_owner_secret = fetch_response.get("oauth_token_secret")
-    print("Got OAuth token: %s" % resource_owner_key)
+        if attempt + 1 < MAX_ATTEMPTS:
+            print(f"{label}{reason}. Waiting for {delay:.1f} seconds.")
+            time.sleep(delay)
 
-    # Get authorization
-    base_authorization_url = "https://api.twitter.com/oauth/authorize"
-    authorization_url = oauth.authorization_url(base_authorization_url)
-    subprocess.run(f"echo '{authorization_url}' | pbcopy", shell=True)
-    print(
-        "Please go here and authorize (it has been copied to your clipboard): %s"
-        % authorization_url
-    )
-    verifier = input("Paste the PIN here: ")
-
-    # Get the access token
-    access_token_url = "https://api.twitter.com/oauth/access_token"
-    oauth = OAuth1Session(
-        consumer_key,
-        client_secret=consumer_secret,
-        resource_owner_key=resource_owner_key,
-        resource_owner_secret=resource_owner_secret,
-        verifier=verifier,
-    )
-    oauth_tokens = oauth.fetch_access_token(access_token_url)
+    raise Exception(f"{reason}. Giving up after {MAX_ATTEMPTS} attempts.")
 
-    access_token = oauth_tokens["oauth_token"]
-    access_token_secret = oauth_tokens["oauth_token_secret"]
 
-    # Create the final OAuth session
-    return OAuth1Session(
-        consumer_key,
-        client_secret=consumer_secret,
-        resource_owner_key=access_token,
-        resource_owner_secret=access_token_secret,
-    )
+def thread_digest(tweets):
+    return hashlib.sha256("\0".join(tweets).encode()).hexdigest()
 
 
-def post_tweet(oauth, payload, in_reply_to_id=None):
-    if in_reply_to_id:
-        payload["reply"] = {"in_reply_to_tweet_id": in_reply_to_id}
+def post_thread(tweets, note_path, resume=False, limiter=None, verbose=True):
+    digest = thread_digest(tweets)
+    posted = get_posted_tweets(note_path, digest) if resume else []
+    if not posted:
+        # A fresh thread; posts journaled for an earlier version of the note,
+        # which could never be resumed, go too.
+        clear_posts(note_path)
+    elif verbose:
+        print(f"Resuming after post {len(posted)} of {len(tweets)}.")
 
-    response = oauth.post("https://api.twitter.com/2/tweets", json=payload)
+    label = "" if verbose else f"{os.path.basename(note_path)}: "
+    previous_tweet_id = posted[-1] if posted else None
+    for i in range(len(posted), len(tweets)):
+        tweet = tweets[i]
+        payload = {"text": tweet}
+        response = post_tweet(payload, previous_tweet_id, limiter, label)
+        previous_tweet_id = response["data"]["id"]
+        with span("journal post"):
+            record_post(note_path, digest, i, len(tweets), previous_tweet_id)
+        if verbose:
+            print(f"Posted tweet {i+1}.")
+            print(tweet)
+    if verbose:
+        print(
+            f"Thread posted successfully! It was {len(tweets)} post{"s" if len(tweets) > 1 else ""} long."
+        )
 
-    if response.status_code == 429:  # Rate limit exceeded
-        reset_time = int(response.headers.get("x-rate-limit-reset", 0))
-        sleep_time = max(reset_time - time.time(), 0) + 1
-        print(f"Rate limit exceeded. Waiting for {sleep_time} seconds.")
-        time.sleep(sleep_time)
-        return post_tweet(oauth, payload, in_reply_to_id)  # Retry after waiting
 
-    if response.status_code != 201:
-        raise Exception(
-            f"Request returned an error: {response.status_code} {response.text}"
+def resume_thread():
+    thread = get_unfinished_thread()
+    if thread is None:
+        print("There is no partly posted thread to resume.")
+        exit(1)
+    try:
+        content = read_session_note(thread["note"])
+    except FileNotFoundError:
+        print(
+            f"Error: {thread['note']} no longer exists. Run 'python main.py tweet --discard' to forget its thread."
         )
-
-    return response.json()
+        exit(1)
+    # The journal doesn't say whether the thread was numbered, but the digest does.
+    for numbered in (False, True):
+        tweets = split_into_tweets(content, numbered)
+        if thread_digest(tweets) == thread["digest"]:
+            break
+    else:
+        print(
+            f"Error: {os.path.basename(thread['note'])} changed after its thread was started, so it can't be resumed. Post it again, or run 'python main.py tweet --discard' to forget the thread."
+        )
+        exit(1)
+    print(
+        f"{os.path.basename(thread['note'])}: {thread['posted']} of {thread['total']} posts were already posted."
+    )
+    post_thread(tweets, thread["note"], resume=True)
 
 
-def post_thread(oauth, tweets):
-    previous_tweet_id = None
-    for i, tweet in enumerate(tweets):
-        payload = {"text": tweet}
-        response = post_tweet(oauth, payload, previous_tweet_id)
-        previous_tweet_id = response["data"]["id"]
-        print(f"Posted tweet {i+1}.")
-        print(tweet)
+def discard_thread():
+    thread = get_unfinished_thread()
+    if thread is None:
+        print("There is no partly posted thread to discard.")
+        exit(1)
+    clear_posts(thread["note"])
     print(
-        f"Thread posted successfully! It was {len(tweets)} post{"s" if len(tweets) > 1 else ""} long."
+        f"Forgot the thread for {os.path.basename(thread['note'])}. Its {thread['posted']} of {thread['total']} posts stay on X."
     )
 
 
@@ -135,6 +187,57 @@ def select_directory():
             print("Invalid choice. Please enter 1 or 2.")
 
 
+def list_page(selected_dir, before):
+    # One extra row tells whether there is an older page.
+    if selected_dir == COLLECTED_SESSIONS_DIR:
+        return list_days(before, PAGE_SIZE + 1)
+    rows = list_sessions(before, PAGE_SIZE + 1)
+    if rows:
+        # Only the notes on this page are checked for edits and deletions.
+        refresh_sessions(rows[-1]["number"], rows[0]["number"])
+        rows = list_sessions(before, PAGE_SIZE + 1)
+    return rows
+
+
+def select_note(selected_dir, file_type):
+    pages = [None]
+    while True:
+        rows = list_page(selected_dir, pages[-1])
+        files = [row["path"] for row in rows[:PAGE_SIZE]]
+        has_older = len(rows) > PAGE_SIZE
+        if not files and len(pages) == 1:
+            return None
+
+        for i, file in enumerate(files):
+            print(f"{i+1}. {os.path.basename(file)}")
+        options = ""
+        if has_older:
+            options += ", n for older"
+        if len(pages) > 1:
+            options += ", p for newer"
+
+        while True:
+            choice = (
+                input(f"Select a {file_type} to upload (enter number{options}): ")
+                .strip()
+                .lower()
+            )
+            if choice == "n" and has_older:
+                pages.append(rows[PAGE_SIZE - 1]["number"])
+                break
+            if choice == "p" and len(pages) > 1:
+                pages.pop()
+                break
+            try:
+                selection = int(choice) - 1
+            except ValueError:
+                print("Please enter a number.")
+                continue
+            if 0 <= selection < len(files):
+                return files[selection]
+            print("Invalid selection. Please try again.")
+
+
 def display_tweet_preview(tweets):
     print()
     print("=" * 40)
@@ -158,13 +261,27 @@ def confirm_post():
             print("Please enter 'y' for yes or 'n' for no.")
 
 
-def main():
-    oauth = create_oauth_session()
+def main(resume=False, numbered=False, discard=False):
+    if discard:
+        discard_thread()
+        return
+    if resume:
+        resume_thread()
+        return
+
+    thread = get_unfinished_thread()
+    if thread:
+        print(
+            f"Note: the thread for {os.path.basename(thread['note'])} stopped after {thread['posted']} of {thread['total']} posts. Run 'python main.py tweet --resume' to finish it, or 'python main.py tweet --discard' to forget it."
+        )
 
     selected_dir, file_type = select_directory()
 
-    if not os.path.exists(selected_dir):
-        err_str = "Error: {selected_dir} does not exist. "
+    if selected_dir == COLLECTED_SESSIONS_DIR:
+        refresh_days()
+    selected_file = select_note(selected_dir, file_type)
+    if selected_file is None:
+        err_str = f"Error: there are no {file_type}s yet. "
         if file_type == "collected session":
             err_str += "Run 'sudo python3 main.py collect' command to collect multiple notes into one note before trying this command again."
         else:
@@ -172,34 +289,13 @@ def main():
         print(err_str)
         exit(1)
 
-    files = [f for f in os.listdir(selected_dir) if f.endswith(".md")]
-    if not files:
-        print(f"No markdown files found in the {file_type} directory.")
-        exit(1)
-
-    for i, file in enumerate(files):
-        print(f"{i+1}. {file}")
-
-    while True:
-        try:
-            selection = (
-                int(input(f"Select a {file_type} to upload (enter number): ")) - 1
-            )
-            if 0 <= selection < len(files):
-                selected_file = files[selection]
-                break
-            else:
-                print("Invalid selection. Please try again.")
-        except ValueError:
-            print("Please enter a number.")
-
-    note_content = read_session_note(os.path.join(selected_dir, selected_file))
-    tweets = split_into_tweets(note_content)
+    note_content = read_session_note(selected_file)
+    tweets = split_into_tweets(note_content, numbered)
 
     display_tweet_preview(tweets)
 
     if confirm_post():
-        post_thread(oauth, tweets)
+        post_thread(tweets, selected_file)
     else:
         print("Thread posting cancelled.")
 